@@ -0,0 +1,148 @@
+"""Synthetic PDF/DOCX corpus generator for the benchmark suite.
+
+Everything is generated offline from a seed, so two runs with the same spec
+produce the same inputs and their numbers are comparable.
+"""
+
+from __future__ import annotations
+
+import random
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    name: str
+    files: int = 4  # documents per kind
+    pdf_pages: int = 10
+    pdf_attachments: int = 2
+    xmp_kb: int = 4
+    docx_members: int = 20
+    media_kb: int = 256
+    seed: int = 1
+
+    def as_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+# Named grids; "quick" is meant for CI-sized smoke runs
+SPECS: Dict[str, List[CorpusSpec]] = {
+    "quick": [
+        CorpusSpec("small", files=4, pdf_pages=5, docx_members=10, media_kb=64),
+    ],
+    "full": [
+        CorpusSpec("small", files=20, pdf_pages=5, docx_members=10, media_kb=64),
+        CorpusSpec("many-pages", files=4, pdf_pages=500, pdf_attachments=0, xmp_kb=1),
+        CorpusSpec("attachments", files=8, pdf_pages=20, pdf_attachments=25),
+        CorpusSpec("big-xmp", files=8, pdf_pages=20, xmp_kb=1024),
+        CorpusSpec("many-members", files=8, docx_members=500, media_kb=16),
+        CorpusSpec("big-media", files=4, docx_members=10, media_kb=64 * 1024),
+    ],
+}
+
+
+def _xmp(size_kb: int, rng: random.Random) -> bytes:
+    head = (
+        b'<?xpacket begin="" id="W5M0MpCehiHzreSzNTczkc9d"?>'
+        b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF '
+        b'xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+        b'<rdf:Description xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:description>'
+    )
+    tail = b"</dc:description></rdf:Description></rdf:RDF></x:xmpmeta><?xpacket end=\"w\"?>"
+    filler = max(0, size_kb * 1024 - len(head) - len(tail))
+    word = b"%08x " % rng.getrandbits(32)
+    return head + (word * (filler // len(word) + 1))[:filler] + tail
+
+
+def make_pdf(path: Path, spec: CorpusSpec, rng: random.Random) -> None:
+    import pikepdf  # type: ignore
+
+    pdf = pikepdf.Pdf.new()
+    for i in range(spec.pdf_pages):
+        page = pdf.add_blank_page(page_size=(612, 792))
+        text = f"BT /F1 12 Tf 72 720 Td (page {i} {rng.random()}) Tj ET".encode()
+        page.obj["/Contents"] = pdf.make_stream(text)
+        if i % 3 == 0:
+            page.obj["/PieceInfo"] = pikepdf.Dictionary()
+            page.obj["/LastModified"] = pikepdf.String("D:20200101000000Z")
+
+    pdf.docinfo["/Title"] = f"Synthetic {path.stem}"
+    pdf.docinfo["/Author"] = "Benchmark"
+    pdf.docinfo["/Producer"] = "sanitize benchmarks"
+    pdf.Root["/Metadata"] = pdf.make_stream(_xmp(spec.xmp_kb, rng))
+    pdf.Root["/ViewerPreferences"] = pikepdf.Dictionary()
+    pdf.Root["/OpenAction"] = pikepdf.Array([pdf.pages[0].obj, pikepdf.Name("/Fit")])
+    names = pikepdf.Dictionary()
+    js = pikepdf.Dictionary()
+    js["/Names"] = pikepdf.Array([pikepdf.String("init"), pdf.make_stream(b"app.alert(1)")])
+    names["/JavaScript"] = js
+    pdf.Root["/Names"] = names
+    for i in range(spec.pdf_attachments):
+        pdf.attachments[f"attachment-{i}.bin"] = rng.randbytes(4096)
+    pdf.save(str(path))
+
+
+def make_docx(path: Path, spec: CorpusSpec, rng: random.Random) -> None:
+    core = (
+        b'<?xml version="1.0" encoding="UTF-8"?>'
+        b"<cp:coreProperties "
+        b'xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+        b'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/">'
+        b"<dc:title>Synthetic</dc:title><dc:creator>Benchmark</dc:creator>"
+        b"<cp:lastModifiedBy>Someone</cp:lastModifiedBy>"
+        b"<dcterms:created>2020-01-01T00:00:00Z</dcterms:created></cp:coreProperties>"
+    )
+    app = (
+        b'<?xml version="1.0" encoding="UTF-8"?>'
+        b'<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+        b"<Application>Word</Application><Company>ACME</Company><TotalTime>42</TotalTime></Properties>"
+    )
+    content_types = (
+        b'<?xml version="1.0" encoding="UTF-8"?>'
+        b'<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        b'<Default Extension="xml" ContentType="application/xml"/>'
+        b'<Override PartName="/docProps/custom.xml" '
+        b'ContentType="application/vnd.openxmlformats-officedocument.custom-properties+xml"/></Types>'
+    )
+    body = b"".join(
+        b"<w:p><w:r><w:t>%d %f</w:t></w:r></w:p>" % (i, rng.random()) for i in range(200)
+    )
+    document = (
+        b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        b"<w:body>" + body + b"</w:body></w:document>"
+    )
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", content_types)
+        z.writestr("docProps/core.xml", core)
+        z.writestr("docProps/app.xml", app)
+        z.writestr("docProps/custom.xml", b"<Properties/>")
+        z.writestr("docProps/thumbnail.jpeg", rng.randbytes(2048))
+        z.writestr("word/document.xml", document)
+        for i in range(max(0, spec.docx_members - 6)):
+            z.writestr(f"word/parts/part{i}.xml", b"<p>%d</p>" % i * 50)
+        if spec.media_kb:
+            # Already-compressed media is stored, like real images and video
+            z.writestr(
+                "word/media/media1.bin",
+                rng.randbytes(spec.media_kb * 1024),
+                compress_type=zipfile.ZIP_STORED,
+            )
+
+
+def build(spec: CorpusSpec, root: Path) -> Dict[str, List[Path]]:
+    """Generate ``spec`` under ``root``; returns the files per kind."""
+    rng = random.Random(spec.seed)
+    out: Dict[str, List[Path]] = {"pdf": [], "docx": []}
+    base = root / spec.name
+    base.mkdir(parents=True, exist_ok=True)
+    for i in range(spec.files):
+        p = base / f"doc{i:04d}.pdf"
+        make_pdf(p, spec, rng)
+        out["pdf"].append(p)
+        d = base / f"doc{i:04d}.docx"
+        make_docx(d, spec, rng)
+        out["docx"].append(d)
+    return out
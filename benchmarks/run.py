@@ -0,0 +1,227 @@
+"""Benchmark sanitize over a synthetic corpus.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.run                       # quick grid, print a table
+    python -m benchmarks.run --grid full --save baseline.json
+    python -m benchmarks.run --compare baseline.json --threshold 15
+
+Every case (corpus x kind x preset x output mode) runs in a fresh spawned
+process against its own copy of the corpus, so peak RSS and temp-disk figures
+are per case and not inherited from earlier ones.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .corpus import SPECS, CorpusSpec, build
+
+KINDS = ("pdf", "docx")
+PRESETS = ("safe", "balanced", "aggressive")
+MODES = ("replace", "backup", "export")
+
+# Metrics where bigger is better; everything else is "lower is better"
+_HIGHER_IS_BETTER = {"files_per_s", "mb_per_s"}
+
+
+def _tree_bytes(root: Path) -> int:
+    total = 0
+    for dirpath, _dirs, files in os.walk(root):
+        for f in files:
+            with contextlib.suppress(OSError):  # removed while we walked
+                total += os.lstat(os.path.join(dirpath, f)).st_size
+    return total
+
+
+class _DiskSampler(threading.Thread):
+    """Samples the bytes under ``root`` to find the temp-disk high-water mark."""
+
+    def __init__(self, root: Path, interval: float = 0.002) -> None:
+        super().__init__(daemon=True)
+        self.root = root
+        self.interval = interval
+        self.baseline = _tree_bytes(root)
+        self.peak = self.baseline
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.is_set():
+            self.peak = max(self.peak, _tree_bytes(self.root))
+            time.sleep(self.interval)
+
+    def finish(self) -> int:
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, _tree_bytes(self.root))
+        return self.peak - self.baseline
+
+
+def _max_rss_kb() -> int:
+    if sys.platform == "win32":
+        return 0  # no getrusage; peak RSS is not measured there
+    import resource
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # macOS reports bytes
+
+
+def _run_case(files: List[str], preset: str, mode: str, workdir: str, trace: bool) -> Dict:
+    # Runs in a spawned child: import here so the parent's heap is not counted
+    from sanitize.core.ops import process_file
+
+    work = Path(workdir)
+    inputs = []
+    for f in files:
+        dst = work / "in" / Path(f).name
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(f, dst)
+        inputs.append(dst)
+    out_dir = work / "out"
+    in_bytes = sum(p.stat().st_size for p in inputs)
+
+    if trace:
+        tracemalloc.start()
+    rss_before = _max_rss_kb()
+    sampler = _DiskSampler(work)
+    sampler.start()
+    started = time.perf_counter()
+    for p in inputs:
+        process_file(p, preset=preset, mode=mode, out_dir=out_dir, sidecar=True)
+    elapsed = time.perf_counter() - started
+    out_bytes = sampler.finish()
+
+    result = {
+        "files": len(inputs),
+        "input_bytes": in_bytes,
+        "seconds": round(elapsed, 4),
+        "files_per_s": round(len(inputs) / elapsed, 3),
+        "mb_per_s": round(in_bytes / elapsed / 1e6, 3),
+        "peak_rss_kb": _max_rss_kb(),
+        "rss_growth_kb": _max_rss_kb() - rss_before,
+        "disk_peak_bytes": out_bytes,
+    }
+    if trace:
+        result["py_heap_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run(
+    grid: str, kinds, presets, modes, trace: bool = False, keep: Optional[Path] = None
+) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("spawn")
+    root = Path(keep) if keep else Path(tempfile.mkdtemp(prefix="sanitize-bench-"))
+    cases: Dict[str, Any] = {}
+    specs: List[CorpusSpec] = SPECS[grid]
+    try:
+        for spec in specs:
+            corpus = build(spec, root / "corpus")
+            for kind in kinds:
+                for preset in presets:
+                    for mode in modes:
+                        case_id = f"{spec.name}/{kind}/{preset}/{mode}"
+                        workdir = Path(tempfile.mkdtemp(prefix="case-", dir=root))
+                        with ctx.Pool(1) as pool:
+                            res = pool.apply(
+                                _run_case,
+                                ([str(p) for p in corpus[kind]], preset, mode, str(workdir), trace),
+                            )
+                        shutil.rmtree(workdir, ignore_errors=True)
+                        res["corpus"] = spec.as_dict()
+                        cases[case_id] = res
+                        print(_format_row(case_id, res), flush=True)
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    from sanitize import __version__
+
+    return {"version": __version__, "grid": grid, "python": sys.version.split()[0], "cases": cases}
+
+
+def _format_row(case_id: str, res: Dict[str, Any]) -> str:
+    return (
+        f"{case_id:<40} {res['files_per_s']:>9.2f} files/s {res['mb_per_s']:>9.2f} MB/s "
+        f"{res['peak_rss_kb'] / 1024:>8.1f} MB rss {res['disk_peak_bytes'] / 1e6:>8.2f} MB disk"
+    )
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> int:
+    """Print per-case deltas against ``baseline``; return how many regressed beyond threshold."""
+    regressions = 0
+    for case_id, cur in current["cases"].items():
+        base = baseline.get("cases", {}).get(case_id)
+        if base is None:
+            print(f"{case_id:<40} (not in baseline)")
+            continue
+        parts = []
+        for metric in ("files_per_s", "mb_per_s", "peak_rss_kb", "disk_peak_bytes"):
+            old, new = base.get(metric), cur.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            worse = -change if metric in _HIGHER_IS_BETTER else change
+            flag = ""
+            if worse > threshold:
+                flag = " !"
+                regressions += 1
+            parts.append(f"{metric} {change:+.1f}%{flag}")
+        print(f"{case_id:<40} " + ", ".join(parts))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        prog="python -m benchmarks.run", description=__doc__.splitlines()[0]
+    )
+    p.add_argument("--grid", choices=sorted(SPECS), default="quick")
+    p.add_argument("--kind", action="append", choices=KINDS, help="Limit to a kind (repeatable)")
+    p.add_argument("--preset", action="append", choices=PRESETS, help="Limit to a preset")
+    p.add_argument("--mode", action="append", choices=MODES, help="Limit to an output mode")
+    p.add_argument(
+        "--tracemalloc", action="store_true", help="Also record Python heap peak (slower)"
+    )
+    p.add_argument("--save", metavar="JSON", help="Write results to this file")
+    p.add_argument("--compare", metavar="JSON", help="Compare against a saved baseline")
+    p.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percent change counted as a regression in --compare (default: 10)",
+    )
+    p.add_argument("--keep", metavar="DIR", help="Generate the corpus here and keep it")
+    args = p.parse_args(argv)
+
+    results = run(
+        args.grid,
+        args.kind or KINDS,
+        args.preset or PRESETS,
+        args.mode or MODES,
+        trace=args.tracemalloc,
+        keep=Path(args.keep) if args.keep else None,
+    )
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print()
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
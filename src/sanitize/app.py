@@ -3,14 +3,28 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import signal
 import sys
-from glob import glob
+import textwrap
+import threading
+from concurrent.futures import CancelledError
+from itertools import chain
+from dataclasses import asdict
 from pathlib import Path
-from typing import Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List, TextIO
 
-from .core.ops import process_file
+from .core.batch import resolve_jobs, run_batch
+from .core.cache import DEFAULT_MAX_BYTES, DEFAULT_MAX_ENTRIES, ResultCache
+from .core.docx import DEFAULT_CHUNK_SIZE
+from .core.fileio import DURABILITY_LEVELS
+from .core.ops import process_stream
+from .core.pdf import SAVE_PROFILES
 from .core.report import FileReport
+from .core.reportstore import ReportStore, open_report_store
+from .core.timing import StageSummary
+from .discover import iter_documents
 from .logging_config import setup_logging
+from .watch import DEFAULT_SETTLE, DropWatcher
 
 
 def _parse_args(argv: List[str]) -> argparse.Namespace:
@@ -19,32 +33,201 @@ def _parse_args(argv: List[str]) -> argparse.Namespace:
         description="Sanitize documents. GUI if no arguments; headless otherwise.",
         add_help=True,
     )
-    p.add_argument("paths", nargs="*", help="Files or globs to sanitize")
+    p.add_argument(
+        "paths", nargs="*", help="Files or globs to sanitize; '-' pipes stdin to stdout"
+    )
     p.add_argument("--auto", action="store_true", help="Auto-detect type by extension (default)")
     p.add_argument("--preset", choices=["safe", "balanced", "aggressive"], default="balanced")
     p.add_argument("--mode", choices=["replace", "backup", "export"], default="replace")
     p.add_argument("--out-dir", default=None, help="Output directory for export mode")
-    p.add_argument("--no-sidecar", action="store_true", help="Disable per-file JSON sidecars")
+    p.add_argument(
+        "--sidecar",
+        dest="sidecar",
+        action="store_const",
+        const=True,
+        default=None,
+        help="Write per-file JSON sidecars (the default unless --report-store is given)",
+    )
+    p.add_argument(
+        "--no-sidecar",
+        dest="sidecar",
+        action="store_const",
+        const=False,
+        help="Disable per-file JSON sidecars",
+    )
+    p.add_argument(
+        "--report-store",
+        default=None,
+        metavar="PATH",
+        help="Append every report to one store: SQLite for .sqlite/.db, JSON lines otherwise",
+    )
     p.add_argument("--json-array", action="store_true", help="Emit one JSON array instead of JSON lines")
     p.add_argument("--dry-run", action="store_true", help="Report only; do not write outputs")
+    p.add_argument(
+        "--audit",
+        action="store_true",
+        help="Report what would be removed by reading only the metadata; writes nothing",
+    )
     p.add_argument("--recursive", action="store_true", help="Recurse into directories")
+    p.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Only take files matching this glob (repeatable); patterns with '/' "
+        "match the path below the directory given",
+    )
+    p.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Skip files and directories matching this glob (repeatable)",
+    )
+    p.add_argument(
+        "--verify",
+        choices=["none", "sample", "full"],
+        default="none",
+        help="Re-read outputs from disk to check the reported state (default: none)",
+    )
+    p.add_argument(
+        "--durability",
+        choices=DURABILITY_LEVELS,
+        default="none",
+        help="Sync outputs to disk: none (leave it to the OS), file (fsync each), "
+        "or batch (group-commit about once a second)",
+    )
+    p.add_argument(
+        "--save-profile",
+        choices=SAVE_PROFILES,
+        default=None,
+        help="PDF save options: fast (no linearization), compact, or web "
+        "(linearized); default: per preset",
+    )
+    p.add_argument(
+        "--chunk-size",
+        type=_size_arg,
+        default=DEFAULT_CHUNK_SIZE,
+        metavar="SIZE",
+        help="Copy buffer for large packages, e.g. 256K or 4M (default: 1M)",
+    )
+    p.add_argument(
+        "--cache",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help="Skip files already sanitized in earlier runs (default store: config dir)",
+    )
+    p.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        metavar="N",
+        help="Evict least recently used cache entries beyond N",
+    )
+    p.add_argument(
+        "--cache-max-size",
+        type=_size_arg,
+        default=DEFAULT_MAX_BYTES,
+        metavar="SIZE",
+        help="Evict least recently used cache entries beyond SIZE (default: 256M)",
+    )
+    p.add_argument(
+        "--cache-clear",
+        action="store_true",
+        help="Invalidate the result cache (with --cache PATH: that store) and exit",
+    )
+    p.add_argument(
+        "--jobs",
+        "-j",
+        type=_jobs_arg,
+        default=None,
+        help="Worker processes: N or 'auto' for one per CPU (default: 1; with --serve: auto)",
+    )
+    p.add_argument(
+        "--unordered",
+        action="store_true",
+        help="With --jobs, emit results as files finish instead of in input order",
+    )
+    p.add_argument(
+        "--memory-budget",
+        type=_size_arg,
+        default=None,
+        metavar="SIZE",
+        help="With --jobs or --serve, cap the estimated memory of files in flight, e.g. 4G",
+    )
+    p.add_argument(
+        "--watch",
+        action="store_true",
+        help="Stay running and sanitize documents dropped into the given directories",
+    )
+    p.add_argument(
+        "--watch-settle",
+        type=float,
+        default=DEFAULT_SETTLE,
+        metavar="SECONDS",
+        help="With --watch, wait until a file is unchanged this long (default: 2)",
+    )
+    p.add_argument(
+        "--watch-poll",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="With --watch, rescan every SECONDS instead of using inotify",
+    )
+    p.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a resident daemon with warm workers, listening on --socket",
+    )
+    p.add_argument(
+        "--socket",
+        default=None,
+        metavar="PATH",
+        help="Unix socket of the daemon; without --serve, send the files to it",
+    )
+    p.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a per-stage timing summary for the batch to stderr",
+    )
+    p.add_argument(
+        "--profile-dir",
+        default=None,
+        metavar="DIR",
+        help="With --profile, also write cProfile stats per worker process to DIR",
+    )
     p.add_argument("--verbose", "-v", action="count", default=0)
     return p.parse_args(argv)
 
 
-def _iter_files(paths: Iterable[str], recursive: bool) -> Iterable[Path]:
-    for pat in paths:
-        p = Path(pat)
-        if p.is_dir():
-            if recursive:
-                yield from (q for q in p.rglob("*") if q.is_file())
-        else:
-            # globs
-            matched = list(map(Path, glob(pat)))
-            if matched:
-                yield from (m for m in matched if m.is_file())
-            elif p.exists() and p.is_file():
-                yield p
+_SIZE_SUFFIXES = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3}
+
+
+def _size_arg(value: str) -> int:
+    text = value.strip().lower().removesuffix("b").removesuffix("i")
+    num, suffix = (text[:-1], text[-1]) if text and text[-1] in "kmg" else (text, "")
+    try:
+        size = int(float(num) * _SIZE_SUFFIXES[suffix])
+    except ValueError:
+        size = 0
+    if size < 1:
+        raise argparse.ArgumentTypeError(f"expected a size like 65536, 256K or 4M, got {value!r}")
+    return size
+
+
+def _jobs_arg(value: str) -> int:
+    try:
+        return resolve_jobs(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"expected a positive integer or 'auto', got {value!r}"
+        ) from None
+
+
+def _discover(args: argparse.Namespace) -> Iterator[Path]:
+    return iter_documents(args.paths, args.recursive, args.include, args.exclude)
 
 
 def _detect_kind(path: Path) -> str:
@@ -56,8 +239,63 @@ def _detect_kind(path: Path) -> str:
     return "unknown"
 
 
+class _ReportWriter:
+    """Print each report as soon as it is available.
+
+    JSON lines by default; with ``array`` the same layout ``json.dumps(reports,
+    indent=2)`` would produce, written element by element so nothing is held
+    back until the batch ends.
+    """
+
+    def __init__(self, stream: TextIO, array: bool = False) -> None:
+        self.stream = stream
+        self.array = array
+        self.count = 0
+
+    def write(self, report: FileReport | Dict[str, Any]) -> None:
+        data = report if isinstance(report, dict) else asdict(report)
+        if self.array:
+            sep = "[\n" if self.count == 0 else ",\n"
+            self.stream.write(sep + textwrap.indent(json.dumps(data, indent=2), "  "))
+        else:
+            self.stream.write(json.dumps(data, ensure_ascii=False) + "\n")
+        self.stream.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        if self.array:
+            self.stream.write("\n]\n" if self.count else "[]\n")
+            self.stream.flush()
+
+
+def _report_store(args: argparse.Namespace) -> ReportStore | None:
+    return open_report_store(Path(args.report_store)) if args.report_store else None
+
+
+def _profile_dir(args: argparse.Namespace) -> Path | None:
+    return Path(args.profile_dir) if args.profile and args.profile_dir else None
+
+
 def headless_main(argv: List[str]) -> int:
     args = _parse_args(argv)
+    cache = None
+    if args.cache is not None or args.cache_clear:
+        cache = ResultCache(
+            Path(args.cache) if args.cache else None,
+            max_entries=args.cache_max_entries,
+            max_bytes=args.cache_max_size,
+        )
+    if args.serve:
+        if not args.socket:
+            print("sanitize: --serve needs --socket PATH", file=sys.stderr)
+            return 2
+        return _serve_main(args, cache)
+    if args.cache_clear:
+        assert cache is not None
+        removed = cache.clear()
+        cache.close()
+        print(json.dumps({"cache": str(cache.path), "removed": removed}))
+        return 0
     if not args.paths:
         # No arguments -> fall back to GUI
         from .gui.webview_app import run_gui
@@ -70,38 +308,221 @@ def headless_main(argv: List[str]) -> int:
     setup_logging(level)
     log = logging.getLogger("sanitize")
 
-    files = list(_iter_files(args.paths, args.recursive))
-    if not files:
+    opts: Dict[str, Any] = dict(
+        preset=args.preset,
+        mode=args.mode,
+        out_dir=Path(args.out_dir) if args.out_dir else None,
+        sidecar=args.sidecar if args.sidecar is not None else not args.report_store,
+        dry_run=args.dry_run,
+        audit=args.audit,
+        verify=args.verify,
+        chunk_size=args.chunk_size,
+        cache=cache,
+        save_profile=args.save_profile,
+        durability=args.durability,
+        digests=bool(args.report_store),
+    )
+    if args.paths == ["-"]:
+        return _pipe_main(args, log)
+    if args.watch:
+        return _watch_main(args, opts, log)
+    if args.socket:
+        return _client_main(args, opts, log)
+
+    # Discovery is lazy: files are sanitized while the directories are still being walked
+    found = _discover(args)
+    first = next(found, None)
+    if first is None:
         log.error("No files matched.")
         return 2
+    files = chain([first], found)
+
+    def _supported(candidates: Iterable[Path]) -> Iterable[Path]:
+        for f in candidates:
+            if _detect_kind(f) not in {"pdf", "docx"}:
+                log.warning("Skipping unsupported file: %s", f)
+                continue
+            yield f
+
+    ok = 0
+    out = _ReportWriter(sys.stdout, array=args.json_array)
+    store = _report_store(args)
+    summary = StageSummary() if args.profile else None
+    results = run_batch(
+        _supported(files),
+        jobs=args.jobs or 1,
+        ordered=not args.unordered,
+        profile_dir=_profile_dir(args),
+        memory_budget=args.memory_budget,
+        **opts,
+    )
+    try:
+        for f, rep, err in results:
+            if err is not None:
+                log.error("Failed to sanitize %s: %s", f, err)
+                continue
+            assert rep is not None
+            out.write(rep)
+            if store is not None:
+                store.add(rep)
+            if summary is not None:
+                summary.add(rep)
+            ok += 1
+    finally:
+        out.close()
+        if store is not None:
+            store.close()
+        if summary is not None:
+            print(summary.format(), file=sys.stderr)
+        if cache is not None:
+            cache.prune()
+            cache.close()
 
-    reports: List[FileReport] = []
-    for f in files:
-        kind = _detect_kind(f)
-        if kind not in {"pdf", "docx"}:
-            log.warning("Skipping unsupported file: %s", f)
-            continue
-        try:
-            rep = process_file(
-                f,
-                preset=args.preset,
-                mode=args.mode,
-                out_dir=Path(args.out_dir) if args.out_dir else None,
-                sidecar=not args.no_sidecar,
-                dry_run=args.dry_run,
-            )
-            reports.append(rep)
-        except Exception as e:
-            log.error("Failed to sanitize %s: %s", f, e)
-
-    if args.json_array:
-        print(json.dumps([r.__dict__ for r in reports], indent=2))
-    else:
-        for r in reports:
-            print(json.dumps(r.__dict__, ensure_ascii=False))
-
-    return 0 if len(reports) > 0 else 1
+    return 0 if ok > 0 else 1
+
+
+def _watch_main(args: argparse.Namespace, opts: Dict[str, Any], log: logging.Logger) -> int:
+    dirs = [Path(p) for p in args.paths]
+    missing = [str(d) for d in dirs if not d.is_dir()]
+    if missing:
+        log.error("--watch needs directories; not a directory: %s", ", ".join(missing))
+        return 2
+    if args.mode == "export" and not opts["out_dir"]:
+        log.error("--out-dir is required for export mode")
+        return 2
+
+    watcher = DropWatcher(
+        dirs,
+        recursive=args.recursive,
+        settle=args.watch_settle,
+        poll_interval=args.watch_poll,
+        exclude=[opts["out_dir"]] if opts["out_dir"] else [],
+    ).start()
+    log.info("Watching %s", ", ".join(str(d) for d in dirs))
+    out = _ReportWriter(sys.stdout, array=args.json_array)
+    store = _report_store(args)
+    summary = StageSummary() if args.profile else None
+    cancel = threading.Event()
+
+    def _shutdown(signum: int, frame: Any) -> None:
+        if cancel.is_set():
+            raise KeyboardInterrupt  # asked twice: stop right away
+        # Ctrl-C and SIGTERM are how watching normally ends: start no new files,
+        # let those in flight stop at their next stage and remove their temp files
+        log.info("Stopping; finishing files in progress")
+        cancel.set()
+        watcher.stop()
+
+    handlers = {}
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            handlers[sig] = signal.signal(sig, _shutdown)
+    results = run_batch(
+        watcher,
+        jobs=args.jobs or 1,
+        ordered=False,
+        profile_dir=_profile_dir(args),
+        cancel=cancel,
+        memory_budget=args.memory_budget,
+        start_method="spawn",  # the watcher thread is already running
+        **opts,
+    )
+    try:
+        # Read on until run_batch is done, so cancelled files get to clean up
+        for f, rep, err in results:
+            watcher.mark_done(f)
+            if isinstance(err, CancelledError):
+                log.info("Stopped before finishing %s", f)
+                continue
+            if err is not None:
+                log.error("Failed to sanitize %s: %s", f, err)
+                continue
+            assert rep is not None
+            out.write(rep)
+            if store is not None:
+                store.add(rep)
+            if summary is not None:
+                summary.add(rep)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for sig, handler in handlers.items():
+            signal.signal(sig, handler)
+        watcher.stop()
+        results.close()
+        out.close()
+        if store is not None:
+            store.close()
+        if summary is not None:
+            print(summary.format(), file=sys.stderr)
+        if opts["cache"] is not None:
+            opts["cache"].close()
+    return 0
+
+
+def _pipe_main(args: argparse.Namespace, log: logging.Logger) -> int:
+    # stdout carries the document, so the report goes to stderr
+    out = sys.stdout.buffer
+    try:
+        rep = process_stream(
+            sys.stdin.buffer,
+            out,
+            preset=args.preset,
+            chunk_size=args.chunk_size,
+            save_profile=args.save_profile,
+        )
+    except Exception as e:
+        log.error("Failed to sanitize stdin: %s", e)
+        return 1
+    out.flush()
+    print(json.dumps(asdict(rep), ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+def _serve_main(args: argparse.Namespace, cache: ResultCache | None) -> int:
+    setup_logging(logging.WARNING - min(args.verbose, 2) * 10)
+    try:
+        from .server import serve
+    except (ImportError, AttributeError):
+        print("sanitize: --serve needs Unix domain sockets on this platform", file=sys.stderr)
+        return 2
+    serve(
+        Path(args.socket),
+        jobs=args.jobs or resolve_jobs("auto"),
+        cache=cache,
+        memory_budget=args.memory_budget,
+    )
+    return 0
+
+
+def _client_main(args: argparse.Namespace, opts: Dict[str, Any], log: logging.Logger) -> int:
+    from .server import request
+
+    files = [str(f) for f in _discover(args) if _detect_kind(f) != "unknown"]
+    if not files:
+        log.error("No files matched.")
+        return 2
+    options = {k: v for k, v in opts.items() if k != "cache"}
+    ok = 0
+    out = _ReportWriter(sys.stdout, array=args.json_array)
+    try:
+        for reply in request(Path(args.socket), files, **options):
+            if "error" in reply:
+                log.error("Failed to sanitize %s: %s", reply.get("document"), reply["error"])
+                continue
+            out.write(reply)
+            ok += 1
+    except OSError as e:
+        log.error("Cannot reach the sanitize daemon at %s: %s", args.socket, e)
+        return 1
+    finally:
+        out.close()
+    return 0 if ok > 0 else 1
 
 
 def main() -> None:
+    # Frozen builds re-enter main() in pool workers; let multiprocessing take over there
+    import multiprocessing
+
+    multiprocessing.freeze_support()
     sys.exit(headless_main(sys.argv[1:]))
@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import cProfile
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .docx import DEFAULT_CHUNK_SIZE
+from .fileio import BATCH_COMMIT_INTERVAL, CommitGroup, Staged, staging
+from .ops import estimate_memory, process_file
+from .report import FileReport
+from .timing import STAGE_PERCENT, ProgressCallback
+
+# (input path, report or None, error or None) for each processed file
+BatchResult = Tuple[Path, Optional[FileReport], Optional[BaseException]]
+
+# Tasks queued per worker beyond the one it is running; keeps input consumption lazy
+_QUEUE_DEPTH = 2
+
+
+def resolve_jobs(value: str | int | None) -> int:
+    """Turn a ``--jobs`` value (N or ``auto``) into a worker count."""
+    if value is None or value == "auto":
+        return os.cpu_count() or 1
+    jobs = int(value)
+    if jobs < 1:
+        raise ValueError(f"jobs must be >= 1 or 'auto', got {value!r}")
+    return jobs
+
+
+def _dump_profile(profiler: cProfile.Profile, profile_dir: Path) -> None:
+    profiler.disable()
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(profile_dir / f"worker-{os.getpid()}.prof"))
+
+
+# Set in each worker by _init_worker when the batch can be cancelled or watched
+_cancel_event: Any = None
+_progress_queue: Any = None
+
+# Progress at which a file's output is in place; cancelling past it would misreport
+_COMMITTED = STAGE_PERCENT["replace"]
+
+# How often the parent checks for cancellation and forwards progress
+_POLL_SECONDS = 0.05
+
+
+def _init_worker(
+    profile_dir: Path | None = None, cancel: Any = None, progress: Any = None
+) -> None:
+    global _cancel_event, _progress_queue
+    # Ctrl-C reaches the whole process group: the parent decides, via ``cancel``,
+    # how files in flight stop, so a worker must not die mid-file with a traceback
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _cancel_event = cancel
+    _progress_queue = progress
+    # Pay the pikepdf import once per worker instead of once per task
+    try:
+        from .pdf import _pikepdf
+
+        _pikepdf()
+    except ImportError:
+        pass
+    if profile_dir is not None:
+        from multiprocessing.util import Finalize
+
+        profiler = cProfile.Profile()
+        # Runs when the pool shuts the worker down
+        Finalize(None, _dump_profile, args=(profiler, profile_dir), exitpriority=10)
+        profiler.enable()
+
+
+def worker_pool(jobs: int, start_method: str | None = None) -> ProcessPoolExecutor:
+    """A pool of warm workers that can be shared by many ``run_batch`` calls.
+
+    ``start_method`` is as for ``run_batch``.
+    """
+    ctx = multiprocessing.get_context(start_method)
+    return ProcessPoolExecutor(max_workers=jobs, mp_context=ctx, initializer=_init_worker)
+
+
+class _Inputs:
+    """``run_batch``'s input: iterated, or polled if it has ``get(timeout)`` (``DropWatcher``)."""
+
+    def __init__(self, paths: Iterable[Path]) -> None:
+        get = None if isinstance(paths, Mapping) else getattr(paths, "get", None)
+        self._get: Optional[Callable[..., Optional[Path]]] = get
+        self._iter = iter(paths) if get is None else None
+        self.polled = get is not None
+        self.exhausted = False
+
+    def next(self, timeout: float = _POLL_SECONDS) -> Optional[Path]:
+        """The next path, or None: once exhausted, or when a polled source had none in time."""
+        if self.exhausted:
+            return None
+        if self._get is not None:
+            try:
+                path = self._get(timeout=timeout)
+            except queue.Empty:
+                return None
+        else:
+            assert self._iter is not None
+            path = next(self._iter, None)
+        if path is None:
+            self.exhausted = True
+        return path
+
+
+def _checkpoint(
+    path: Path, cancel: Any, report: Optional[Callable[[Path, str, int], None]]
+) -> ProgressCallback:
+    """Progress callback that forwards events and aborts the file once cancelled.
+
+    Raising from a progress event unwinds through the sanitizer's own cleanup,
+    so a cancelled file leaves no temp files and its original untouched. Once
+    the output has replaced the original the file is allowed to finish.
+    """
+
+    def progress(stage: str, percent: int) -> None:
+        if cancel is not None and percent < _COMMITTED and cancel.is_set():
+            raise CancelledError(f"cancelled while processing {path}")
+        if report is not None:
+            report(path, stage, percent)
+
+    return progress
+
+
+def _process(path: Path, kwargs: Dict[str, Any]) -> FileReport:
+    if _cancel_event is None and _progress_queue is None:
+        return process_file(path, **kwargs)
+    queue = _progress_queue
+    forward = (lambda p, stage, pct: queue.put((p, stage, pct))) if queue is not None else None
+    if _cancel_event is not None and _cancel_event.is_set():
+        raise CancelledError(f"cancelled before processing {path}")
+    return process_file(path, progress=_checkpoint(path, _cancel_event, forward), **kwargs)
+
+
+def _run_one(path: Path, kwargs: Dict[str, Any]) -> Tuple[FileReport, List[Staged]]:
+    # The parent commits "batch" renames for many workers' files at once
+    if kwargs.get("durability") != "batch":
+        return _process(path, kwargs), []
+    group = CommitGroup()
+    try:
+        with staging(group):
+            report = _process(path, kwargs)
+    except BaseException:
+        group.commit()  # what was staged before the failure still lands, as it would unbatched
+        raise
+    return report, group.take()
+
+
+def _commit_abandoned(fut: Future) -> None:
+    # Done callback for a file whose result nobody will read any more
+    if not fut.cancelled() and fut.exception() is None:
+        _report, staged = fut.result()
+        if staged:
+            CommitGroup(staged).commit()
+
+
+def _commit(held: List[Tuple[BatchResult, List[Staged]]]) -> List[BatchResult]:
+    """Commit the renames staged for ``held`` results; files that could not be replaced fail."""
+    group = CommitGroup(entry for _result, staged in held for entry in staged)
+    try:
+        failed = group.commit()
+    except OSError as e:
+        return [(path, None, err or e) for (path, _rep, err), _staged in held]
+    results: List[BatchResult] = []
+    for (path, rep, err), staged in held:
+        errors = [failed[dst] for _src, dst in staged if dst in failed]
+        results.append((path, None, errors[0]) if errors else (path, rep, err))
+    return results
+
+
+def run_batch(
+    paths: Iterable[Path],
+    jobs: int = 1,
+    ordered: bool = True,
+    profile_dir: Path | None = None,
+    cancel: threading.Event | None = None,
+    progress: Callable[[Path, str, int], None] | None = None,
+    pool: ProcessPoolExecutor | None = None,
+    memory_budget: int | None = None,
+    start_method: str | None = None,
+    **kwargs: Any,
+) -> Generator[BatchResult, None, None]:
+    """Sanitize ``paths`` with ``process_file``, yielding one result per input.
+
+    ``jobs == 1`` runs serially in this process. Otherwise files are fanned out
+    to a pool of warm worker processes; results come back in input order when
+    ``ordered`` is true, or as soon as each file finishes when it is false.
+    Failures are yielded rather than raised so one bad file never stops a batch.
+
+    With ``profile_dir``, each process doing the work records a cProfile
+    profile and writes it there as ``worker-<pid>.prof`` once the batch ends.
+
+    ``progress(path, stage, percent)`` is called in this thread as files move
+    through their stages. Once ``cancel`` is set no new files are started and
+    files in flight stop at their next stage boundary, cleaning up after
+    themselves; every input not finished by then is yielded with a
+    ``CancelledError``.
+
+    ``pool`` runs the batch on an existing ``worker_pool`` (``jobs`` then only
+    sizes the submission window) and leaves it running afterwards; cancel,
+    progress and profiling need a pool of their own and are not available.
+
+    ``memory_budget`` (bytes) caps the ``estimate_memory`` total of the files
+    handed to the pool at once, so a few very large documents run with fewer
+    workers than ``jobs`` instead of all at once. A file over the budget on
+    its own still runs, just by itself.
+
+    ``start_method`` picks how the pool's workers are started (see
+    ``multiprocessing.get_context``; None is the platform default). Hosts that
+    already run threads, like the GUI or a watcher, should pass "spawn": a
+    forked child only gets the forking thread, and any lock another thread
+    held stays locked in it for good.
+
+    With ``durability="batch"`` the outputs files finish with are renamed into
+    place together, by one ``fileio.CommitGroup`` commit about every
+    ``BATCH_COMMIT_INTERVAL`` seconds (sooner when nothing else is in flight),
+    and each result is only yielded once its document has been committed.
+    """
+    if pool is not None and (cancel or progress or profile_dir):
+        raise ValueError("cancel, progress and profile_dir need run_batch's own pool")
+    if pool is None and jobs <= 1:
+        # "batch" durability: results held until their staged renames are committed
+        uncommitted: List[Tuple[BatchResult, List[Staged]]] = []
+        deadline = 0.0
+        inputs = _Inputs(paths)
+        profiler = cProfile.Profile() if profile_dir is not None else None
+        try:
+            while True:
+                path = inputs.next()
+                if path is None:
+                    if inputs.exhausted:
+                        break
+                    # A polled source is idle: do not sit on finished files meanwhile
+                    if uncommitted:
+                        committed, uncommitted = _commit(uncommitted), []
+                        yield from committed
+                    continue
+                staged: List[Staged] = []
+                if cancel is not None and cancel.is_set():
+                    result: BatchResult = (
+                        path,
+                        None,
+                        CancelledError(f"cancelled before processing {path}"),
+                    )
+                else:
+                    if cancel is not None or progress is not None:
+                        kwargs["progress"] = _checkpoint(path, cancel, progress)
+                    if profiler is not None:
+                        profiler.enable()
+                    group = CommitGroup()
+                    try:
+                        with staging(group):
+                            result = (path, process_file(path, **kwargs), None)
+                    except Exception as e:
+                        result = (path, None, e)
+                    staged = group.take()
+                    if profiler is not None:
+                        profiler.disable()
+                if not uncommitted and not staged:
+                    yield result
+                    continue
+                if not uncommitted:
+                    deadline = time.monotonic() + BATCH_COMMIT_INTERVAL
+                uncommitted.append((result, staged))
+                if time.monotonic() >= deadline:
+                    committed, uncommitted = _commit(uncommitted), []
+                    yield from committed
+            committed, uncommitted = _commit(uncommitted), []
+            yield from committed
+        finally:
+            if uncommitted:
+                # Closed early: the work is done, so still replace the documents
+                _commit(uncommitted)
+            if profiler is not None:
+                assert profile_dir is not None
+                _dump_profile(profiler, profile_dir)
+        return
+
+    window = jobs * _QUEUE_DEPTH
+    inputs = _Inputs(paths)
+    cache = None if kwargs.get("dry_run") or kwargs.get("audit") else kwargs.get("cache")
+    inflight: Dict[Future, Tuple[int, Path]] = {}
+    done: Dict[int, BatchResult] = {}
+    staged_results: Dict[int, Tuple[BatchResult, List[Staged]]] = {}
+    deadline = 0.0
+    costs: Dict[Future, int] = {}
+    held: Optional[Path] = None  # next input, waiting for memory to free up
+    submitted = 0
+    next_out = 0
+
+    ctx = multiprocessing.get_context(start_method)
+    worker_cancel = ctx.Event()
+    progress_queue = ctx.SimpleQueue() if progress is not None else None
+    poll = _POLL_SECONDS if cancel is not None or progress is not None else None
+
+    own_pool = pool is None
+    if pool is None:
+        pool = ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(profile_dir, worker_cancel if cancel is not None else None, progress_queue),
+        )
+    try:
+
+        def _fill() -> None:
+            nonlocal submitted, held
+            while len(inflight) + len(done) + len(staged_results) < window:
+                if held is not None:
+                    path: Optional[Path] = held
+                    held = None
+                else:
+                    # Only wait on a polled source (a watcher) when there is nothing to collect
+                    idle = not (inflight or done or staged_results)
+                    path = inputs.next(timeout=_POLL_SECONDS if idle else 0)
+                if path is None:
+                    return
+                if worker_cancel.is_set():
+                    err = CancelledError(f"cancelled before processing {path}")
+                    done[submitted] = (path, None, err)
+                    submitted += 1
+                    continue
+                cost = 0
+                if memory_budget is not None:
+                    cost = estimate_memory(path, kwargs.get("chunk_size", DEFAULT_CHUNK_SIZE))
+                    if inflight and sum(costs.values()) + cost > memory_budget:
+                        held = path
+                        return
+                assert pool is not None
+                fut = pool.submit(_run_one, path, kwargs)
+                inflight[fut] = (submitted, path)
+                costs[fut] = cost
+                submitted += 1
+
+        def _forward_progress() -> None:
+            assert progress is not None and progress_queue is not None
+            while not progress_queue.empty():
+                progress(*progress_queue.get())
+
+        _fill()
+        while inflight or done or staged_results or not inputs.exhausted:
+            if cancel is not None and cancel.is_set() and not worker_cancel.is_set():
+                worker_cancel.set()
+                for fut in inflight:
+                    fut.cancel()  # only succeeds for files no worker has started
+            timeout = poll
+            if inputs.polled and not inputs.exhausted:
+                timeout = _POLL_SECONDS  # keep feeding new drops to idle workers
+            if staged_results:
+                remaining = max(0.0, deadline - time.monotonic())
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            finished: Set[Future] = set()
+            if inflight:
+                finished, _ = wait(inflight, timeout=timeout, return_when=FIRST_COMPLETED)
+            if progress is not None:
+                _forward_progress()
+            for fut in finished:
+                idx, path = inflight.pop(fut)
+                costs.pop(fut)
+                staged = []
+                try:
+                    report, staged = fut.result()
+                    result = (path, report, None)
+                except Exception as e:
+                    result = (path, None, e)
+                else:
+                    if cache is not None and not report.cached:
+                        cache.stored()  # the worker's copy stored it; evict from here
+                if not staged:
+                    done[idx] = result
+                    continue
+                if not staged_results:
+                    deadline = time.monotonic() + BATCH_COMMIT_INTERVAL
+                staged_results[idx] = (result, staged)
+            if staged_results and (not inflight or time.monotonic() >= deadline):
+                committed = _commit(list(staged_results.values()))
+                done.update(zip(staged_results, committed, strict=True))
+                staged_results.clear()
+            if ordered:
+                while next_out in done:
+                    yield done.pop(next_out)
+                    next_out += 1
+            else:
+                for idx in sorted(done):
+                    yield done.pop(idx)
+            _fill()
+    finally:
+        # Closed early: files already done, or finishing now, still replace their documents
+        if staged_results:
+            _commit(list(staged_results.values()))
+        for fut in inflight:
+            fut.add_done_callback(_commit_abandoned)
+        if own_pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+        else:
+            for fut in inflight:
+                fut.cancel()
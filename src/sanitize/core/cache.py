@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+from ..config import _platform_config_dir
+from ..version import __version__
+from .report import FileReport, report_from_dict
+
+DEFAULT_MAX_ENTRIES = 200_000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Eviction runs once per this many inserts rather than on every write
+_PRUNE_EVERY = 512
+
+# Connections of the copies of a cache unpickled in batch workers, per store
+# and thread, so each task does not reconnect and set the database up again
+_worker_local = threading.local()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    digest TEXT NOT NULL,
+    preset TEXT NOT NULL,
+    version TEXT NOT NULL,
+    output_digest TEXT NOT NULL,
+    report TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (digest, preset, version)
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+
+def _key(preset: str | None, save_profile: str | None) -> str:
+    # Outputs written with different save profiles differ byte for byte
+    return f"{preset or ''}/{save_profile}" if save_profile else preset or ""
+
+
+def default_cache_path() -> Path:
+    return _platform_config_dir() / "cache.sqlite3"
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Shared between threads (daemon requests), serialized by ResultCache._lock
+    conn = sqlite3.connect(
+        str(path), timeout=30.0, isolation_level=None, check_same_thread=False
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _worker_connection(path: Path) -> sqlite3.Connection:
+    if getattr(_worker_local, "pid", None) != os.getpid():
+        # First use in this process (or thread); a forked child must not reuse its parent's
+        _worker_local.pid = os.getpid()
+        _worker_local.conns = {}
+    conns: Dict[Path, sqlite3.Connection] = _worker_local.conns
+    conn = conns.get(path)
+    if conn is None:
+        conn = conns[path] = _connect(path)
+    return conn
+
+
+class CacheEntry(NamedTuple):
+    report: FileReport
+    output_digest: str
+
+
+class ResultCache:
+    """Persistent SQLite cache of ``FileReport``s keyed by content digest.
+
+    Entries are keyed by (sha256 of a file, preset and PDF save profile,
+    sanitizer version). Each
+    sanitize stores a row for its input digest and one for its output digest,
+    both pointing at the output digest, so a lookup can tell "this content is
+    already a sanitizer output" (``output_digest == digest``) from "this
+    content was sanitized before into something else". Rows are evicted least
+    recently used first once ``max_entries`` or ``max_bytes`` is exceeded.
+
+    The connection is opened lazily and dropped on pickling, so an instance
+    can be handed to batch worker processes. Each worker keeps one connection
+    per store for all the copies it receives. Copies leave eviction to the
+    original, which ``run_batch`` tells about their inserts through ``stored``.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.path = Path(path) if path else default_cache_path()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._puts = 0
+        self._copy = False
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+        self._copy = True
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = _worker_connection(self.path) if self._copy else _connect(self.path)
+        return self._conn
+
+    def get(
+        self, digest: str, preset: str, save_profile: str | None = None
+    ) -> Optional[CacheEntry]:
+        preset = _key(preset, save_profile)
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT output_digest, report FROM results"
+                " WHERE digest = ? AND preset = ? AND version = ?",
+                (digest, preset, __version__),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE results SET last_used = ? WHERE digest = ? AND preset = ? AND version = ?",
+                (time.time(), digest, preset, __version__),
+            )
+        return CacheEntry(report_from_dict(json.loads(row[1])), row[0])
+
+    def put(self, report: FileReport, input_digest: str, output_digest: str) -> None:
+        blob = json.dumps(dataclasses.asdict(report), ensure_ascii=False)
+        now = time.time()
+        key = _key(report.preset, report.save_profile)
+        rows = [
+            (d, key, __version__, output_digest, blob, len(blob), now)
+            for d in {input_digest, output_digest}
+        ]
+        with self._lock:
+            self._db().executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        if not self._copy:
+            self.stored()
+
+    def stored(self, count: int = 1) -> None:
+        """Count ``count`` inserts toward the next eviction, made here or by copies in workers."""
+        with self._lock:
+            before = self._puts
+            self._puts += count
+            if self._puts // _PRUNE_EVERY > before // _PRUNE_EVERY:
+                self.prune()
+
+    def prune(self) -> int:
+        """Evict least recently used rows beyond the entry and size caps."""
+        with self._lock:
+            db = self._db()
+            rows, total = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+            if rows <= self.max_entries and total <= self.max_bytes:
+                return 0  # within the caps: skip sorting the whole table
+            keep_rows = 0
+            keep_bytes = 0
+            doomed = []
+            for rowid, size in db.execute(
+                "SELECT rowid, size FROM results ORDER BY last_used DESC"
+            ):
+                if keep_rows < self.max_entries and keep_bytes + size <= self.max_bytes:
+                    keep_rows += 1
+                    keep_bytes += size
+                else:
+                    doomed.append((rowid,))
+            if doomed:
+                db.executemany("DELETE FROM results WHERE rowid = ?", doomed)
+            return len(doomed)
+
+    def clear(self) -> int:
+        """Drop every entry; returns how many were removed."""
+        with self._lock:
+            return self._db().execute("DELETE FROM results").rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            # A worker's copy borrows the connection its process keeps for the store
+            if self._conn is not None and not self._copy:
+                self._conn.close()
+            self._conn = None
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import copy
+import io
+import os
+import shutil
+import struct
 import tempfile
 import zipfile
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Set, Tuple, cast
 
+from .fileio import DURABILITY_LEVELS, copy_file, make_durable
+from .pdf import _should_verify
+from .timing import StageTimer
 
 NS = {
     "cp": "http://schemas.openxmlformats.org/package/2006/metadata/core-properties",
@@ -41,6 +49,12 @@ SANITIZE_KEYS_APP = [
 
 
 def _read_props(zipf: zipfile.ZipFile) -> Dict[str, Any]:
+    return _props_from_parts(zipf.namelist(), zipf.read)
+
+
+def _props_from_parts(names: Iterable[str], read: Callable[[str], bytes]) -> Dict[str, Any]:
+    """Build the property state from a member list and a reader for docProps parts."""
+    names = list(names)
     out: Dict[str, Any] = {
         "core": {},
         "dcterms": {},
@@ -48,8 +62,8 @@ def _read_props(zipf: zipfile.ZipFile) -> Dict[str, Any]:
         "custom_props_present": False,
         "thumbnail_present": False,
     }
-    if "docProps/core.xml" in zipf.namelist():
-        xml = zipf.read("docProps/core.xml")
+    if "docProps/core.xml" in names:
+        xml = read("docProps/core.xml")
         try:
             root = ET.fromstring(xml)
             for ns, tag in SANITIZE_KEYS_CORE:
@@ -62,8 +76,8 @@ def _read_props(zipf: zipfile.ZipFile) -> Dict[str, Any]:
                     out["dcterms"][f"dcterms:{tag}"] = el.text
         except Exception:
             pass
-    if "docProps/app.xml" in zipf.namelist():
-        xml = zipf.read("docProps/app.xml")
+    if "docProps/app.xml" in names:
+        xml = read("docProps/app.xml")
         try:
             root = ET.fromstring(xml)
             for ns, tag in SANITIZE_KEYS_APP:
@@ -72,8 +86,8 @@ def _read_props(zipf: zipfile.ZipFile) -> Dict[str, Any]:
                     out["app"][f"{ns}:{tag}"] = el.text
         except Exception:
             pass
-    out["custom_props_present"] = "docProps/custom.xml" in zipf.namelist()
-    out["thumbnail_present"] = any(n.lower().startswith("docprops/thumbnail") for n in zipf.namelist())
+    out["custom_props_present"] = "docProps/custom.xml" in names
+    out["thumbnail_present"] = any(n.lower().startswith("docprops/thumbnail") for n in names)
     return out
 
 
@@ -116,55 +130,338 @@ def _content_types_remove_entries(xml_bytes: bytes, parts: List[str]) -> bytes:
     )
 
 
-def sanitize_inplace(path: Path) -> Dict[str, Any]:
-    old_meta = {}
-    tmp_path = Path(
-        tempfile.mkstemp(
-            prefix=path.stem + "_clean_", suffix=path.suffix, dir=str(path.parent)
-        )[1]
+# Local file header: signature, versions/flags/method/time/date, CRC and sizes, name/extra lengths
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_LOCAL_HEADER_SIG = b"PK\x03\x04"
+_FLAG_ENCRYPTED = 0x01
+_FLAG_DATA_DESCRIPTOR = 0x08
+_DATA_DESCRIPTOR_SIG = 0x08074B50
+_ZIP64_EXTRA_ID = 0x0001
+
+# Bytes held in memory at once when copying package data; see ``chunk_size`` below
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def _without_zip64_extra(extra: bytes) -> bytes:
+    # FileHeader() appends its own zip64 record when the sizes need one
+    out = bytearray()
+    i = 0
+    while i + 4 <= len(extra):
+        hid, size = struct.unpack("<HH", extra[i : i + 4])
+        if hid != _ZIP64_EXTRA_ID:
+            out += extra[i : i + 4 + size]
+        i += 4 + size
+    return bytes(out)
+
+
+def _copy_member_raw(
+    src, zout: zipfile.ZipFile, info: zipfile.ZipInfo, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> None:
+    """Copy ``info``'s compressed bytes from ``src`` into ``zout`` without recompressing.
+
+    The original compression method, CRC and sizes are kept. The local header is
+    rewritten with sizes inline, so no data descriptor follows the payload,
+    except for encrypted members: their password check byte depends on the
+    data-descriptor flag, so they keep it and get a fresh descriptor.
+    """
+    src.seek(info.header_offset)
+    header = src.read(_LOCAL_HEADER.size)
+    fields = _LOCAL_HEADER.unpack(header)
+    if fields[0] != _LOCAL_HEADER_SIG:
+        raise zipfile.BadZipFile(f"Bad local header for {info.filename!r}")
+    src.seek(fields[9] + fields[10], 1)
+
+    zinfo = copy.copy(info)
+    if not info.flag_bits & _FLAG_ENCRYPTED:
+        zinfo.flag_bits &= ~_FLAG_DATA_DESCRIPTOR
+    zinfo.extra = _without_zip64_extra(info.extra)
+    zip64 = info.file_size > zipfile.ZIP64_LIMIT or info.compress_size > zipfile.ZIP64_LIMIT
+    # ZipFile has no public raw-write API; mirror what writestr() does with its state
+    with zout._lock:  # type: ignore[attr-defined]
+        out = zout.fp
+        assert out is not None
+        zinfo.header_offset = out.tell()
+        out.write(zinfo.FileHeader(zip64))
+        remaining = info.compress_size
+        while remaining:
+            chunk = src.read(min(chunk_size, remaining))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Truncated member {info.filename!r}")
+            out.write(chunk)
+            remaining -= len(chunk)
+        if zinfo.flag_bits & _FLAG_DATA_DESCRIPTOR:
+            out.write(
+                struct.pack(
+                    "<LLQQ" if zip64 else "<LLLL",
+                    _DATA_DESCRIPTOR_SIG,
+                    info.CRC,
+                    info.compress_size,
+                    info.file_size,
+                )
+            )
+        zout.filelist.append(zinfo)
+        zout.NameToInfo[zinfo.filename] = zinfo
+        zout.start_dir = out.tell()
+        zout._didModify = True  # type: ignore[attr-defined]
+
+
+# Peak memory model for estimate_memory: interpreter and XML parts, plus the
+# central directory entries zipfile keeps for each member
+_MEMORY_BASE = 8 * 1024 * 1024
+_MEMORY_PER_MEMBER = 1024
+
+
+def estimate_memory(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Rough peak memory, in bytes, that sanitizing ``path`` will need.
+
+    Members are copied ``chunk_size`` bytes at a time, so this does not grow
+    with the package size, only with its member count.
+    """
+    try:
+        with zipfile.ZipFile(path) as z:
+            members = len(z.infolist())
+    except (OSError, zipfile.BadZipFile):
+        members = 0
+    return _MEMORY_BASE + 2 * chunk_size + members * _MEMORY_PER_MEMBER
+
+
+def sanitize_inplace(
+    path: Path,
+    verify: str = "none",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    timer: StageTimer | None = None,
+    durability: str = "none",
+) -> Dict[str, Any]:
+    """Rewrite ``path`` with its document properties cleared.
+
+    Only the docProps parts and ``[Content_Types].xml`` are inflated and
+    rewritten; every other member is copied as its original compressed bytes,
+    ``chunk_size`` bytes at a time, so peak memory does not grow with the
+    package (media, embedded video) but only with the small XML parts.
+    The "new" state is derived from the parts as written rather than by
+    reopening the output; ``verify`` ("full", "sample" or "none") re-reads the
+    finished package and checks it against that state. A package with nothing
+    to clear is left untouched. Stage timings and byte counts are added to
+    ``timer`` when one is given; ``durability`` is as for ``fileio.replace``.
+    """
+    return _rewrite(path, path, verify, chunk_size, timer or StageTimer(), durability)
+
+
+def sanitize_to(
+    path: Path,
+    dest: Path,
+    verify: str = "none",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    timer: StageTimer | None = None,
+    durability: str = "none",
+) -> Dict[str, Any]:
+    """Export mode: read ``path`` and write the sanitized package straight to ``dest``.
+
+    A package with nothing to clear is copied with ``fileio.copy_file``
+    (reflink or in-kernel copy where available).
+    """
+    return _rewrite(path, dest, verify, chunk_size, timer or StageTimer(), durability)
+
+
+def audit(path: Path, timer: StageTimer | None = None) -> Dict[str, Any]:
+    """What sanitizing ``path`` would clear, without writing anything.
+
+    Reads the central directory and the docProps parts only.
+    """
+    timer = timer or StageTimer()
+    with timer.stage("open"):
+        zin = zipfile.ZipFile(path)
+    with zin:
+        old_meta, new_meta, _drop, _props = _plan(zin, timer)
+    return {"old": old_meta, "new": new_meta, "path": str(path)}
+
+
+def _plan(
+    zin: zipfile.ZipFile, timer: StageTimer
+) -> Tuple[Dict[str, Any], Dict[str, Any], Set[str], Dict[str, bytes]]:
+    """Work out what to change: (old state, new state, parts to drop, rewritten props)."""
+    names = zin.namelist()
+    with timer.stage("inspect"):
+        old_meta = _read_props(zin)
+    timer.bytes_read += sum(
+        i.compress_size for i in zin.infolist() if i.filename.startswith("docProps/")
     )
+    drop_parts = set()
+    if "docProps/custom.xml" in names:
+        drop_parts.add("docProps/custom.xml")
+    for name in names:
+        if name.lower().startswith("docprops/thumbnail"):
+            drop_parts.add(name)
+
+    with timer.stage("strip"):
+        props: Dict[str, bytes] = {}
+        if "docProps/core.xml" in names:
+            props["docProps/core.xml"] = _sanitize_core(zin.read("docProps/core.xml"))
+        if "docProps/app.xml" in names:
+            props["docProps/app.xml"] = _sanitize_app(zin.read("docProps/app.xml"))
+        written = [n for n in names if n not in drop_parts]
+        new_meta = _props_from_parts(written, props.__getitem__)
+    return old_meta, new_meta, drop_parts, props
+
+
+def _write_package(
+    zin: zipfile.ZipFile,
+    raw: BinaryIO,
+    out: Path | BinaryIO,
+    drop_parts: Set[str],
+    props: Dict[str, bytes],
+    chunk_size: int,
+    timer: StageTimer,
+) -> None:
+    """Write the sanitized package to ``out``, copying untouched members from ``raw``."""
+    with timer.stage("write"), zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zout:
+        report = timer.within("write", 40, 85)
+        total = sum(i.compress_size for i in zin.infolist()) or 1
+        done = 0
+        for item in zin.infolist():
+            if report is not None:
+                report(done * 100 // total)
+                done += item.compress_size
+            name = item.filename
+            if name in drop_parts:
+                continue
+            if name == "[Content_Types].xml" and drop_parts:
+                data = _content_types_remove_entries(zin.read(name), parts=list(drop_parts))
+            elif name in props:
+                data = props[name]
+            else:
+                _copy_member_raw(raw, zout, item, chunk_size)
+                continue
+            zout.writestr(name, data)
+
+
+def _rewrite(
+    path: Path,
+    dest: Path,
+    verify: str,
+    chunk_size: int,
+    timer: StageTimer,
+    durability: str = "none",
+) -> Dict[str, Any]:
+    from .pdf import _atomic_replace  # reuse
+
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(f"Unknown durability level: {durability}")
+    tmp_path: Path | None = None
     try:
-        with zipfile.ZipFile(path, "r") as zin:
-            old_meta = _read_props(zin)
-            with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zout:
-                drop_parts = set()
-                if "docProps/custom.xml" in zin.namelist():
-                    drop_parts.add("docProps/custom.xml")
-                for name in zin.namelist():
-                    if name.lower().startswith("docprops/thumbnail"):
-                        drop_parts.add(name)
-
-                for item in zin.infolist():
-                    name = item.filename
-                    if name in drop_parts:
-                        continue
-                    data = zin.read(name)
-                    if name == "[Content_Types].xml" and drop_parts:
-                        data = _content_types_remove_entries(data, parts=list(drop_parts))
-                    elif name == "docProps/core.xml":
-                        data = _sanitize_core(data)
-                    elif name == "docProps/app.xml":
-                        data = _sanitize_app(data)
-                    zout.writestr(name, data)
-
-        # Replace original
-        from .pdf import _atomic_replace  # reuse
-
-        _atomic_replace(tmp_path, path)
-
-        with zipfile.ZipFile(path, "r") as zfinal:
-            new_meta = _read_props(zfinal)
-        return {"old": old_meta, "new": new_meta, "path": str(path)}
+        with timer.stage("open"):
+            zin = zipfile.ZipFile(path, "r")
+        with zin:
+            old_meta, new_meta, drop_parts, props = _plan(zin, timer)
+
+            if not drop_parts and new_meta == old_meta:
+                # Nothing to clear: keep the original bytes
+                if dest != path:
+                    with timer.stage("copy"):
+                        copy_file(path, dest)
+                        make_durable(dest, durability)
+                    size = path.stat().st_size
+                    timer.bytes_read += size
+                    timer.bytes_written += size
+                return {"old": old_meta, "new": new_meta, "path": str(dest)}
+
+            fd, name = tempfile.mkstemp(
+                prefix=dest.stem + "_clean_", suffix=dest.suffix, dir=str(dest.parent)
+            )
+            os.close(fd)
+            tmp_path = Path(name)
+            with open(path, "rb") as raw:
+                _write_package(zin, raw, tmp_path, drop_parts, props, chunk_size, timer)
+            timer.bytes_read += path.stat().st_size
+            timer.bytes_written += tmp_path.stat().st_size
+
+        if _should_verify(verify, dest):
+            with timer.stage("verify"), zipfile.ZipFile(tmp_path, "r") as zcheck:
+                actual = _read_props(zcheck)
+            if actual != new_meta:
+                raise RuntimeError(
+                    f"verification failed for {dest}: properties differ from written state"
+                )
+
+        with timer.stage("replace"):
+            _atomic_replace(tmp_path, dest, durability)
+        return {"old": old_meta, "new": new_meta, "path": str(dest)}
     except Exception:
         try:
-            if tmp_path.exists():
+            if tmp_path is not None and tmp_path.exists():
                 tmp_path.unlink(missing_ok=True)
         except Exception:
             pass
         raise
 
 
-def sanitize_to(path: Path, dest: Path) -> Dict[str, Any]:
-    dest.write_bytes(Path(path).read_bytes())
-    return sanitize_inplace(dest)
+class _CountingWriter(io.RawIOBase):
+    """Unseekable pass-through writer that counts what goes through it."""
+
+    def __init__(self, raw: BinaryIO) -> None:
+        super().__init__()
+        self._raw = raw
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._raw.write(b)
+        self.size += len(b)
+        return len(b)
+
+    def flush(self) -> None:
+        self._raw.flush()
+
+
+def sanitize_stream(
+    src: BinaryIO,
+    dst: BinaryIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    timer: StageTimer | None = None,
+) -> Dict[str, Any]:
+    """Sanitize the package read from ``src`` and write it to ``dst``; no files are touched.
+
+    ``src`` is read in full first unless it is seekable. ``dst`` may be a pipe.
+    Returns the "old" and "new" states; a package with nothing to clear is
+    written out unchanged.
+    """
+    timer = timer or StageTimer()
+    if not src.seekable():
+        with timer.stage("read"):
+            src = io.BytesIO(src.read())
+    start = src.tell()
+    size = src.seek(0, io.SEEK_END) - start
+    src.seek(start)
+    with timer.stage("open"):
+        zin = zipfile.ZipFile(src, "r")
+    with zin:
+        old_meta, new_meta, drop_parts, props = _plan(zin, timer)
+        if not drop_parts and new_meta == old_meta:
+            src.seek(start)
+            with timer.stage("copy"):
+                shutil.copyfileobj(src, dst, chunk_size)
+            timer.bytes_written += size
+        elif dst.seekable():
+            before = dst.tell()
+            _write_package(zin, src, dst, drop_parts, props, chunk_size, timer)
+            timer.bytes_written += dst.tell() - before
+        else:
+            # zipfile falls back to data descriptors when it cannot seek back
+            counted = _CountingWriter(dst)
+            # zipfile only writes, flushes and asks tell(), which it emulates here
+            _write_package(zin, src, cast(BinaryIO, counted), drop_parts, props, chunk_size, timer)
+            timer.bytes_written += counted.size
+    timer.bytes_read += size
+    return {"old": old_meta, "new": new_meta}
+
 
+def sanitize_bytes(
+    data: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE, timer: StageTimer | None = None
+) -> Dict[str, Any]:
+    """In-memory ``sanitize_stream``: returns "old", "new" and the sanitized "data"."""
+    out = io.BytesIO()
+    rep = sanitize_stream(io.BytesIO(data), out, chunk_size=chunk_size, timer=timer)
+    rep["data"] = out.getvalue()
+    return rep
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Linux FICLONE ioctl: share the source's extents with the destination (btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+# How hard replaced files are pushed to stable storage: "none" leaves it to the
+# OS, "file" fsyncs each file and its directory, "batch" group-commits them
+DURABILITY_LEVELS = ("none", "file", "batch")
+# With "batch", files finished within this many seconds are committed together
+BATCH_COMMIT_INTERVAL = 1.0
+
+
+def _reflink_linux(src: Path, dst: Path) -> bool:
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return True
+        except OSError:
+            pass
+    dst.unlink(missing_ok=True)
+    return False
+
+
+def _reflink_macos(src: Path, dst: Path) -> bool:
+    import ctypes
+
+    try:
+        libc = ctypes.CDLL("libc.dylib", use_errno=True)
+        clonefile = libc.clonefile
+    except (OSError, AttributeError):
+        return False
+    return clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+
+
+def reflink(src: Path, dst: Path) -> bool:
+    """Clone ``src`` to a new file ``dst`` without copying data, if the filesystem can.
+
+    Returns False (leaving ``dst`` absent) when copy-on-write clones are unsupported.
+    """
+    if dst.exists():
+        return False
+    try:
+        if sys.platform.startswith("linux"):
+            return _reflink_linux(src, dst)
+        if sys.platform == "darwin":
+            return _reflink_macos(src, dst)
+    except OSError:
+        dst.unlink(missing_ok=True)
+    return False
+
+
+def _copy_file_range(src: Path, dst: Path) -> bool:
+    if not hasattr(os, "copy_file_range"):
+        return False
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        copied = 0
+        try:
+            while remaining > 0:
+                n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if n == 0:
+                    break
+                remaining -= n
+                copied += n
+        except OSError:
+            # Cross-device on older kernels, unsupported filesystem, ...
+            if copied == 0:
+                return False
+            raise
+    return remaining <= 0
+
+
+def copy_file(src: Path, dst: Path) -> str:
+    """Copy file contents ``src`` -> ``dst`` as cheaply as the platform allows.
+
+    Tries a copy-on-write clone, then in-kernel ``copy_file_range``, then
+    ``shutil.copyfile`` (which itself uses ``sendfile``/``fcopyfile`` where
+    available). Returns the method that succeeded, for reporting and tests.
+
+    The copy is made under a temporary name next to ``dst`` and renamed over
+    it, so a failed copy (disk full, I/O error) leaves an existing ``dst`` as
+    it was.
+    """
+    src, dst = Path(src), Path(dst)
+    if dst.exists() and os.path.samefile(src, dst):
+        raise ValueError(f"Cannot copy {src} onto itself")
+    fd, name = tempfile.mkstemp(prefix=dst.name + ".", suffix=".tmp", dir=str(dst.parent))
+    os.close(fd)
+    tmp = Path(name)
+    tmp.unlink()  # the copy creates it afresh, as a clone or with the usual permissions
+    try:
+        if reflink(src, tmp):
+            method = "reflink"
+        elif _copy_file_range(src, tmp):
+            method = "copy_file_range"
+        else:
+            shutil.copyfile(src, tmp)
+            method = "copy"
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return method
+
+
+def snapshot(src: Path, dst: Path) -> str:
+    """Preserve the current contents of ``src`` as a new file ``dst``, copying little or nothing.
+
+    Only safe for files that are never modified in place afterwards, like the
+    originals the sanitizers replace by renaming a new file over them. A
+    hardlink then keeps the original inode alive under ``dst`` for free; where
+    hardlinks are unavailable (FAT, some network shares) a copy-on-write clone
+    is tried, then a full ``shutil.copy2``. Returns the method used.
+    """
+    src, dst = Path(src), Path(dst)
+    if dst.exists():
+        raise FileExistsError(f"Backup already exists: {dst}")
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except FileExistsError:
+        raise
+    except (OSError, NotImplementedError):
+        pass
+    if reflink(src, dst):
+        shutil.copystat(src, dst)
+        return "reflink"
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def _fsync_path(path: Path, directory: bool = False) -> None:
+    if directory and sys.platform == "win32":
+        return  # directories cannot be opened for fsync; NTFS journals renames itself
+    # fsync only needs a descriptor, and read-only documents (or hardlinked
+    # backups of them) must stay syncable; Windows wants write access to flush
+    flags = os.O_RDWR if sys.platform == "win32" and not directory else os.O_RDONLY
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _syncfs(path: Path) -> bool:
+    """Flush the whole filesystem holding ``path`` in one call (Linux ``syncfs``)."""
+    if not sys.platform.startswith("linux"):
+        return False
+    import ctypes
+
+    try:
+        syncfs = ctypes.CDLL(None, use_errno=True).syncfs
+    except (OSError, AttributeError):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return syncfs(fd) == 0
+    finally:
+        os.close(fd)
+
+
+# A "batch" operation waiting for its group commit: (temp file, document it
+# will replace), or (file just written in place, None)
+Staged = Tuple[Path, Optional[Path]]
+
+
+def _sync_data(entries: List[Staged]) -> None:
+    by_dev: Dict[int, List[Staged]] = {}
+    for entry in entries:
+        by_dev.setdefault(os.stat(entry[0]).st_dev, []).append(entry)
+    for group in by_dev.values():
+        if _syncfs(group[0][0].parent):
+            continue
+        for path, _dst in group:
+            _fsync_path(path)
+        # New names (backups, plain copies) must exist before any document is replaced
+        for d in {path.parent for path, dst in group if dst is None}:
+            _fsync_path(d, directory=True)
+
+
+class CommitGroup:
+    """Renames and new files deferred by "batch" durability, committed together.
+
+    ``commit`` pushes all their data to stable storage first (one ``syncfs``
+    per filesystem where available, otherwise an fsync per file), only then
+    renames the temp files over their documents, and finally fsyncs each
+    directory once. A crash leaves every document either as it was or
+    completely replaced; before ``commit`` none of them has been replaced.
+    """
+
+    def __init__(self, entries: Iterable[Staged] = ()) -> None:
+        self._entries: List[Staged] = list(entries)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, path: Path, dst: Optional[Path] = None) -> None:
+        with self._lock:
+            self._entries.append((Path(path), None if dst is None else Path(dst)))
+
+    def take(self) -> List[Staged]:
+        """Remove and return everything staged so far."""
+        with self._lock:
+            entries, self._entries = self._entries, []
+        return entries
+
+    def source_of(self, dst: Path) -> Path:
+        """Where the content staged to replace ``dst`` is until the commit."""
+        dst = Path(dst)
+        with self._lock:
+            for src, target in reversed(self._entries):
+                if target == dst:
+                    return src
+        return dst
+
+    def commit(self) -> Dict[Path, OSError]:
+        """Commit everything staged; returns the documents that could not be replaced.
+
+        Raises ``OSError`` (after removing the temp files, so no document is
+        replaced) if the data could not be synced.
+        """
+        entries = self.take()
+        failed: Dict[Path, OSError] = {}
+        live: List[Staged] = []
+        for src, dst in entries:
+            if src.exists():
+                live.append((src, dst))
+            elif dst is not None:
+                failed[dst] = FileNotFoundError(f"Staged output vanished: {src}")
+        try:
+            _sync_data(live)
+        except OSError:
+            for src, dst in live:
+                if dst is not None:
+                    src.unlink(missing_ok=True)
+            raise
+        dirs: Set[Path] = set()
+        for src, dst in live:
+            if dst is None:
+                continue
+            try:
+                os.replace(src, dst)
+            except OSError as e:
+                failed[dst] = e
+                src.unlink(missing_ok=True)
+                continue
+            dirs.add(dst.parent)
+        for d in dirs:
+            _fsync_path(d, directory=True)
+        return failed
+
+
+_staging = threading.local()
+
+
+@contextmanager
+def staging(group: CommitGroup) -> Iterator[CommitGroup]:
+    """Collect this thread's "batch" replaces in ``group`` instead of committing each."""
+    previous = getattr(_staging, "group", None)
+    _staging.group = group
+    try:
+        yield group
+    finally:
+        _staging.group = previous
+
+
+def current_group() -> Optional[CommitGroup]:
+    """The ``CommitGroup`` set up by ``staging`` in this thread, if any."""
+    return getattr(_staging, "group", None)
+
+
+def staged_source(path: Path) -> Path:
+    """Where the new content of ``path`` is: a staged temp file, or ``path`` itself."""
+    group = current_group()
+    return group.source_of(path) if group is not None else Path(path)
+
+
+def _stage(path: Path, dst: Optional[Path]) -> None:
+    group = current_group()
+    if group is not None:
+        group.add(path, dst)
+        return
+    # Nobody is batching this thread's writes: commit them as a group of one
+    failed = CommitGroup([(Path(path), None if dst is None else Path(dst))]).commit()
+    for err in failed.values():
+        raise err
+
+
+def make_durable(path: Path, durability: str) -> None:
+    """Push a file just written in place (a backup, a plain copy) to stable storage.
+
+    With "batch" the file joins the current ``CommitGroup``, whose commit
+    syncs it before replacing any document.
+    """
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(f"Unknown durability level: {durability}")
+    if durability == "file":
+        _fsync_path(path)
+        _fsync_path(Path(path).parent, directory=True)
+    elif durability == "batch":
+        _stage(path, None)
+
+
+def replace(src: Path, dst: Path, durability: str = "none") -> None:
+    """Atomically move ``src`` over ``dst``, as durably as ``durability`` asks.
+
+    "file" fsyncs the data before the rename and the directory after it, so a
+    crash leaves either the old or the new document, never a truncated one.
+    "batch" gives the same guarantee for many files at a time: inside
+    ``staging`` the rename is deferred to the group's ``commit`` (use
+    ``staged_source`` to reach the new content meanwhile); outside it, the
+    file is committed on its own straight away.
+    """
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(f"Unknown durability level: {durability}")
+    if durability == "batch":
+        _stage(src, dst)
+        return
+    if durability == "file":
+        _fsync_path(src)
+    os.replace(src, dst)
+    if durability == "file":
+        _fsync_path(Path(dst).parent, directory=True)
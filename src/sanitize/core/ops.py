@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import io
 import json
-import shutil
+import os
+import tempfile
+import threading
 import time
-from dataclasses import asdict
+from concurrent.futures import CancelledError, Executor, ThreadPoolExecutor
+from dataclasses import asdict, replace
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterable, List, Optional, Tuple
 
 from . import pdf as pdfmod
 from . import docx as docxmod
+from .cache import ResultCache
+from . import fileio
+from .fileio import CommitGroup, copy_file, make_durable, snapshot, staged_source, staging
 from .report import FileReport, now_iso
+from .timing import STAGE_PERCENT, ProgressCallback, StageTimer
 
 
 def detect_kind(path: Path) -> str:
@@ -21,6 +31,28 @@ def detect_kind(path: Path) -> str:
     return "unknown"
 
 
+def estimate_memory(path: Path, chunk_size: int = docxmod.DEFAULT_CHUNK_SIZE) -> int:
+    """Rough peak memory, in bytes, for ``process_file`` on ``path``; 0 if unknown."""
+    kind = detect_kind(path)
+    try:
+        if kind == "pdf":
+            return pdfmod.estimate_memory(path)
+        if kind == "docx":
+            return docxmod.estimate_memory(path, chunk_size)
+    except OSError:
+        pass
+    return 0
+
+
+def sniff_kind(head: bytes) -> str:
+    """Detect the type from a document's first bytes, for input without a name."""
+    if head.lstrip()[:5] == b"%PDF-":
+        return "pdf"
+    if head[:4] == b"PK\x03\x04":
+        return "docx"
+    return "unknown"
+
+
 def _diff_pdf(old: Dict[str, Any], new: Dict[str, Any]) -> Tuple[List[str], int]:
     actions: List[str] = []
     removed = 0
@@ -70,6 +102,117 @@ def _diff_docx(old: Dict[str, Any], new: Dict[str, Any]) -> Tuple[List[str], int
     return actions, removed
 
 
+def _sidecar_path(out_file: Path) -> Path:
+    return out_file.with_suffix(out_file.suffix + ".sanitize.json")
+
+
+def _write_sidecar(path: Path, report: FileReport, durability: str) -> None:
+    text = json.dumps(asdict(report), indent=2)
+    if durability != "batch":
+        path.write_text(text, encoding="utf-8")
+        return
+    # Staged like the document, so both appear when the group is committed
+    fd, name = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=str(path.parent))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    fileio.replace(Path(name), path, durability)
+
+
+def _from_cache(
+    cache: ResultCache,
+    digest: str,
+    path: Path,
+    preset: str,
+    mode: str,
+    out_dir: Path | None,
+    save_profile: str | None = None,
+    durability: str = "none",
+) -> Optional[Tuple[FileReport, Path, str]]:
+    """Return the cached report, output file and its digest if ``path`` needs no work."""
+    entry = cache.get(digest, preset, save_profile)
+    if entry is None:
+        return None
+    if mode == "export":
+        assert out_dir is not None
+        dest = out_dir / path.name
+        have = pdfmod._sha256(dest) if dest.exists() else None
+        if have != entry.output_digest:
+            if entry.output_digest != digest:
+                return None
+            # The source is already clean; exporting it is a plain copy
+            out_dir.mkdir(parents=True, exist_ok=True)
+            copy_file(path, dest)
+            make_durable(dest, durability)
+        return entry.report, dest, entry.output_digest
+    if entry.output_digest != digest:
+        # Seen before, but only as an input: this copy still needs sanitizing
+        return None
+    return entry.report, path, digest
+
+
+def _with_digests(report: FileReport, input_digest: str, output_digest: str | None) -> None:
+    # Fresh dicts: a cached report's states are shared with the cache entry
+    report.old = {**report.old, "sha256": input_digest}
+    if output_digest is not None:
+        report.new = {**report.new, "sha256": output_digest}
+
+
+def _replaced(path: Path, before: os.stat_result) -> bool:
+    # A new file was (or, with "batch", is staged to be) renamed over ``path``
+    return staged_source(path) != path or not os.path.samestat(before, path.stat())
+
+
+def _stamp(report: FileReport, timer: StageTimer, started: float) -> FileReport:
+    report.duration_ms = int((time.time() - started) * 1000)
+    report.stages = timer.stages()
+    report.bytes_read = timer.bytes_read
+    report.bytes_written = timer.bytes_written
+    return report
+
+
+def audit_file(
+    path: Path,
+    preset: str = "balanced",
+    progress: ProgressCallback | None = None,
+    digests: bool = False,
+) -> FileReport:
+    """Report what sanitizing ``path`` would remove, reading only the metadata.
+
+    Nothing is written, hashed or cached: see ``pdf.audit`` and ``docx.audit``
+    for what each reads. The report's ``output_mode`` is "audit", ``old`` is
+    the current state, ``new`` the predicted one and ``actions`` what a real
+    run would do. With ``digests`` the file is hashed after all, for ``old``.
+    """
+    kind = detect_kind(path)
+    if kind not in {"pdf", "docx"}:
+        raise ValueError(f"Unsupported file type: {path}")
+    started = time.time()
+    timer = StageTimer(progress)
+    if kind == "pdf":
+        rep = pdfmod.audit(path, timer)
+        actions, _removed = _diff_pdf(rep["old"], rep["new"])
+    else:
+        rep = docxmod.audit(path, timer)
+        actions, _removed = _diff_docx(rep["old"], rep["new"])
+    report = FileReport(
+        sanitized_at_utc=now_iso(),
+        document=str(path),
+        type=kind,
+        old=rep["old"],
+        new=rep["new"],
+        actions=actions,
+        errors=None,
+        preset=preset,
+        output_mode="audit",
+    )
+    if digests:
+        with timer.stage("hash"):
+            _with_digests(report, pdfmod._sha256(path), None)
+        timer.bytes_read += path.stat().st_size
+    timer.advance("done", 100)
+    return _stamp(report, timer, started)
+
+
 def process_file(
     path: Path,
     preset: str = "balanced",
@@ -77,12 +220,102 @@ def process_file(
     out_dir: Path | None = None,
     sidecar: bool = True,
     dry_run: bool = False,
+    verify: str = "none",
+    chunk_size: int = docxmod.DEFAULT_CHUNK_SIZE,
+    cache: ResultCache | None = None,
+    save_profile: str | None = None,
+    progress: ProgressCallback | None = None,
+    audit: bool = False,
+    durability: str = "none",
+    digests: bool = False,
 ) -> FileReport:
+    """Sanitize one file and build its report.
+
+    With a ``cache``, content this sanitizer already produced (same digest,
+    preset and version) is not parsed or rewritten again; the stored report is
+    returned with ``cached=True``.
+
+    The report's ``stages`` break ``duration_ms`` down by step (open, hash,
+    inspect, strip, save/write, verify, replace, sidecar, ...), alongside the
+    bytes read and written for this file.
+
+    PDFs are saved with ``save_profile`` ("fast", "compact" or "web"); when it
+    is None the preset's profile from ``pdf.PRESET_SAVE_PROFILES`` is used.
+
+    ``progress(stage, percent)`` is called as the file moves through those
+    stages (and during the PDF save itself), ending with ``("done", 100)``.
+
+    With ``audit`` nothing is written: the file is only inspected with
+    ``audit_file`` and the other output options are ignored.
+
+    ``durability`` ("none", "file" or "batch", see ``fileio.replace``) decides
+    when the output, and in backup mode the ``.bak`` copy, reach the disk. A
+    document that is left as it was (nothing to clear) gets no ``.bak``.
+    With "batch" inside ``fileio.staging`` the output (and its sidecar) only
+    replace the originals when the caller commits the group; otherwise this
+    file is committed on its own before returning.
+
+    With ``digests`` the report's ``old`` and ``new`` always carry the sha256
+    of the input and the output (PDF states have them anyway), so a
+    ``ReportStore`` can find DOCX reports by digest too.
+    """
+    if audit:
+        return audit_file(path, preset=preset, progress=progress, digests=digests)
+    if durability == "batch" and fileio.current_group() is None:
+        group = CommitGroup()
+        try:
+            with staging(group):
+                report = process_file(
+                    path,
+                    preset=preset,
+                    mode=mode,
+                    out_dir=out_dir,
+                    sidecar=sidecar,
+                    dry_run=dry_run,
+                    verify=verify,
+                    chunk_size=chunk_size,
+                    cache=cache,
+                    save_profile=save_profile,
+                    progress=progress,
+                    durability=durability,
+                    digests=digests,
+                )
+        finally:
+            failed = group.commit()
+        for err in failed.values():
+            raise err
+        return report
     kind = detect_kind(path)
     if kind not in {"pdf", "docx"}:
         raise ValueError(f"Unsupported file type: {path}")
+    profile = pdfmod.save_profile_for(preset, save_profile) if kind == "pdf" else None
 
     started = time.time()
+    timer = StageTimer(progress)
+
+    digest = None
+    if cache is not None and not dry_run and mode == "export" and not out_dir:
+        raise ValueError("out_dir required for export mode")
+    # PDF states carry the input's sha256 already, except in a dry run
+    if (cache is not None and not dry_run) or (digests and (kind == "docx" or dry_run)):
+        # Before anything is written: in replace mode the input is about to go
+        with timer.stage("hash"):
+            digest = pdfmod._sha256(path)
+        timer.bytes_read += path.stat().st_size
+    if cache is not None and digest is not None and not dry_run:
+        with timer.stage("cache_lookup"):
+            hit = _from_cache(cache, digest, path, preset, mode, out_dir, profile, durability)
+        if hit is not None:
+            cached, out_file, cached_digest = hit
+            report = replace(cached, document=str(path), output_mode=mode, cached=True)
+            if digests:
+                _with_digests(report, digest, cached_digest)
+            if sidecar and not _sidecar_path(out_file).exists():
+                _stamp(report, timer, started)
+                with timer.stage("sidecar"):
+                    _write_sidecar(_sidecar_path(out_file), report, durability)
+            timer.advance("done", 100)
+            return _stamp(report, timer, started)
 
     # Determine destination file for export/backup
     if mode == "export":
@@ -92,23 +325,69 @@ def process_file(
         dest = out_dir / path.name
         if not dry_run:
             if kind == "pdf":
-                rep = pdfmod.sanitize_to(path, dest)
+                assert profile is not None
+                rep = pdfmod.sanitize_to(
+                    path,
+                    dest,
+                    verify=verify,
+                    timer=timer,
+                    save_profile=profile,
+                    durability=durability,
+                )
             else:
-                rep = docxmod.sanitize_to(path, dest)
+                rep = docxmod.sanitize_to(
+                    path,
+                    dest,
+                    verify=verify,
+                    chunk_size=chunk_size,
+                    timer=timer,
+                    durability=durability,
+                )
         else:
             # Simulate
             rep = {"old": {}, "new": {}, "path": str(dest)}
     else:
         # replace/backup operate on original
+        backup: Optional[Path] = None
         if mode == "backup" and not dry_run:
             bak = path.with_suffix(path.suffix + ".bak")
             if not bak.exists():
-                shutil.copy2(path, bak)
+                original = path.stat()
+                with timer.stage("backup"):
+                    # The sanitizers rename a new file over ``path``, so the
+                    # original inode can simply live on as the backup
+                    method = snapshot(path, bak)
+                    # Durable before the original is replaced: fsync'ed now with "file",
+                    # synced ahead of the group's renames with "batch"
+                    make_durable(bak, durability)
+                if method == "copy":
+                    timer.bytes_written += bak.stat().st_size
+                backup = bak
         if not dry_run:
-            if kind == "pdf":
-                rep = pdfmod.sanitize_inplace(path)
-            else:
-                rep = docxmod.sanitize_inplace(path)
+            try:
+                if kind == "pdf":
+                    assert profile is not None
+                    rep = pdfmod.sanitize_inplace(
+                        path,
+                        verify=verify,
+                        timer=timer,
+                        save_profile=profile,
+                        durability=durability,
+                    )
+                else:
+                    rep = docxmod.sanitize_inplace(
+                        path,
+                        verify=verify,
+                        chunk_size=chunk_size,
+                        timer=timer,
+                        durability=durability,
+                    )
+            finally:
+                if backup is not None and not _replaced(path, original):
+                    # Nothing replaced the document (already clean, or the
+                    # sanitizer failed); a hardlinked backup would still be the
+                    # document itself, so keep no backup at all
+                    backup.unlink()
         else:
             rep = {"old": {}, "new": {}, "path": str(path)}
 
@@ -126,15 +405,164 @@ def process_file(
         new=rep["new"],
         actions=actions,
         errors=None,
-        duration_ms=int((time.time() - started) * 1000),
         preset=preset,
         output_mode=mode,
+        save_profile=profile,
     )
 
+    out_digest = None
+    if not dry_run and ((cache is not None and digest is not None) or digests):
+        out_digest = rep["new"].get("sha256")
+        if out_digest is None:
+            with timer.stage("hash"):
+                out_digest = pdfmod._sha256(staged_source(Path(rep["path"])))
+    if digests and digest is not None:
+        _with_digests(report, digest, out_digest)
+
+    _stamp(report, timer, started)
+    if cache is not None and digest is not None and out_digest is not None:
+        with timer.stage("cache_store"):
+            cache.put(report, digest, out_digest)
+
     # Sidecar
     if sidecar and not dry_run:
-        out_path = Path(rep["path"]).with_suffix(Path(rep["path"]).suffix + ".sanitize.json")
-        out_path.write_text(json.dumps(asdict(report), indent=2), encoding="utf-8")
+        out_path = _sidecar_path(Path(rep["path"]))
+        _stamp(report, timer, started)
+        with timer.stage("sidecar"):
+            _write_sidecar(out_path, report, durability)
 
-    return report
+    timer.advance("done", 100)
+    return _stamp(report, timer, started)
+
+
+def process_stream(
+    src: BinaryIO,
+    dst: BinaryIO,
+    preset: str = "balanced",
+    kind: str | None = None,
+    chunk_size: int = docxmod.DEFAULT_CHUNK_SIZE,
+    save_profile: str | None = None,
+    progress: ProgressCallback | None = None,
+) -> FileReport:
+    """Sanitize a document read from ``src`` into ``dst`` without touching the filesystem.
+
+    ``kind`` ("pdf" or "docx") is sniffed from the first bytes when not given.
+    The report's ``document`` is "-" and its ``output_mode`` is "stream".
+    """
+    started = time.time()
+    timer = StageTimer(progress)
+    if not src.seekable():
+        with timer.stage("read"):
+            src = io.BytesIO(src.read())
+    if kind is None:
+        pos = src.tell()
+        kind = sniff_kind(src.read(8))
+        src.seek(pos)
+    if kind not in {"pdf", "docx"}:
+        raise ValueError("Unsupported input: expected a PDF or DOCX document")
+
+    profile = pdfmod.save_profile_for(preset, save_profile) if kind == "pdf" else None
+    if kind == "pdf":
+        assert profile is not None
+        rep = pdfmod.sanitize_stream(src, dst, timer=timer, save_profile=profile)
+        actions, _removed = _diff_pdf(rep["old"], rep["new"])
+    else:
+        rep = docxmod.sanitize_stream(src, dst, chunk_size=chunk_size, timer=timer)
+        actions, _removed = _diff_docx(rep["old"], rep["new"])
+    timer.advance("done", 100)
+
+    report = FileReport(
+        sanitized_at_utc=now_iso(),
+        document="-",
+        type=kind,
+        old=rep["old"],
+        new=rep["new"],
+        actions=actions,
+        errors=None,
+        preset=preset,
+        output_mode="stream",
+        save_profile=profile,
+    )
+    return _stamp(report, timer, started)
+
+
+def _abort_when(cancel: threading.Event, path: Path) -> ProgressCallback:
+    """Progress callback that stops ``path`` at its next stage once ``cancel`` is set.
+
+    Raising unwinds through the sanitizers' temp-file cleanup; a file whose
+    output has already replaced the original is left to finish.
+    """
+
+    def progress(stage: str, percent: int) -> None:
+        if percent < STAGE_PERCENT["replace"] and cancel.is_set():
+            raise CancelledError(f"cancelled while processing {path}")
+
+    return progress
+
+
+async def process_many(
+    paths: Iterable[Path],
+    concurrency: int = 4,
+    executor: Executor | None = None,
+    **kwargs: Any,
+) -> AsyncIterator[FileReport]:
+    """Sanitize ``paths`` off the event loop, yielding reports as files finish.
+
+    At most ``concurrency`` files are in flight, and no new file is started
+    while the consumer has not asked for the next report, so a slow consumer
+    holds back the work (and ``paths`` is read lazily). A file that fails is
+    yielded as a report with ``errors`` set. ``kwargs`` go to ``process_file``.
+
+    Work runs on a private thread pool unless ``executor`` is given. If the
+    consuming task is cancelled (or the generator closed early), no new files
+    are started and, on the private pool, files in flight stop at their next
+    stage and remove their temp files; either way the generator waits for them
+    before the cancellation propagates.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be >= 1, got {concurrency}")
+    loop = asyncio.get_running_loop()
+    cancel = threading.Event()
+    own_executor = executor is None
+    pool = executor or ThreadPoolExecutor(concurrency, thread_name_prefix="sanitize")
+
+    def _run(path: Path) -> FileReport:
+        if cancel.is_set():
+            raise CancelledError(f"cancelled before processing {path}")
+        return process_file(path, progress=_abort_when(cancel, path), **kwargs)
 
+    source = iter(paths)
+    pending: Dict["asyncio.Future[FileReport]", Path] = {}
+    try:
+        while True:
+            while len(pending) < concurrency:
+                path = next(source, None)
+                if path is None:
+                    break
+                # Callers' executors may be process pools, which cannot run a closure
+                job = partial(_run, path) if own_executor else partial(process_file, path, **kwargs)
+                pending[loop.run_in_executor(pool, job)] = path
+            if not pending:
+                return
+            finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in finished:
+                path = pending.pop(fut)
+                try:
+                    report = fut.result()
+                except Exception as e:
+                    report = FileReport(
+                        sanitized_at_utc=now_iso(),
+                        document=str(path),
+                        type=detect_kind(path),
+                        errors=str(e),
+                        preset=kwargs.get("preset", "balanced"),
+                        output_mode=kwargs.get("mode", "replace"),
+                    )
+                yield report
+    finally:
+        cancel.set()
+        if pending:
+            # Let the files in flight unwind and clean up before we go
+            await asyncio.shield(asyncio.gather(*pending, return_exceptions=True))
+        if own_executor:
+            pool.shutdown(wait=False)
@@ -2,11 +2,40 @@ from __future__ import annotations
 
 import hashlib
 import inspect
+import io
 import os
+import re
 import tempfile
+import zlib
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict
-
+from typing import Any, BinaryIO, Callable, Deque, Dict, List, Optional, Tuple
+
+from . import fileio
+from .timing import StageTimer
+
+VERIFY_LEVELS = ("none", "sample", "full")
+# With verify="sample", about one output in this many is re-read in full
+VERIFY_SAMPLE_RATE = 16
+
+# How outputs are written: "web" linearizes for byte-range serving, "fast"
+# skips linearization and keeps existing streams as they are, "compact" packs
+# objects into object streams and recompresses everything
+SAVE_PROFILES = ("fast", "compact", "web")
+DEFAULT_SAVE_PROFILE = "web"
+PRESET_SAVE_PROFILES = {"safe": "web", "balanced": "web", "aggressive": "compact"}
+
+# Trailer /ID as qpdf writes it: two hex strings
+_TRAILER_ID_RE = re.compile(rb"/ID\s*\[\s*<([0-9A-Fa-f]*)>\s*<([0-9A-Fa-f]*)>\s*\]")
+# Offset of the last cross-reference section, at the very end of the file
+_STARTXREF_RE = re.compile(rb"startxref\s+(\d+)\s+%%EOF\s*$")
+# Object count from the last trailer (or xref stream) dictionary
+_TRAILER_SIZE_RE = re.compile(rb"/Size\s+(\d+)")
+
+# Peak memory model for estimate_memory: qpdf holds the object graph, while
+# stream data is read from the input on demand as it is written out
+_MEMORY_BASE = 16 * 1024 * 1024
+_MEMORY_PER_OBJECT = 2048
 
 def _sha256(path: Path) -> str:
     h = hashlib.sha256()
@@ -16,8 +45,98 @@ def _sha256(path: Path) -> str:
     return h.hexdigest()
 
 
-def _atomic_replace(src: Path, dst: Path) -> None:
-    os.replace(src, dst)
+def estimate_memory(path: Path) -> int:
+    """Rough peak memory, in bytes, that sanitizing ``path`` will need.
+
+    Memory follows the number of objects rather than the file size: a 2 GB
+    scan with a few large images needs far less than a text-heavy 50 MB file.
+    The count is read from the trailer at the end of the file; when it cannot
+    be found a quarter of the file size is assumed.
+    """
+    size = path.stat().st_size
+    with open(path, "rb") as f:
+        f.seek(max(0, size - 65536))
+        found = _TRAILER_SIZE_RE.findall(f.read())
+    if not found:
+        return _MEMORY_BASE + size // 4
+    return _MEMORY_BASE + int(found[-1]) * _MEMORY_PER_OBJECT
+
+
+def _atomic_replace(src: Path, dst: Path, durability: str = "none") -> None:
+    fileio.replace(src, dst, durability)
+
+
+def _sample_hit(path: Path) -> bool:
+    """Deterministically pick about 1 in ``VERIFY_SAMPLE_RATE`` documents by path."""
+    return zlib.crc32(str(path).encode("utf-8")) % VERIFY_SAMPLE_RATE == 0
+
+
+def _should_verify(level: str, path: Path) -> bool:
+    if level not in VERIFY_LEVELS:
+        raise ValueError(f"Unknown verify level: {level}")
+    return level == "full" or (level == "sample" and _sample_hit(path))
+
+
+class _HashingWriter(io.RawIOBase):
+    """Write-through wrapper that hashes and counts output as it is written.
+
+    It also notes where each ``/ID`` array was written and keeps the last few
+    KB, which end with ``startxref``, so the final trailer's ID can be
+    reported without reading the file back: an xref stream's dictionary (and
+    its ``/ID``) precedes the stream data, which can be far longer than the tail.
+    """
+
+    _TAIL = 4096
+    _OVERLAP = 512  # re-scanned from the previous write, for IDs split across writes
+    _KEEP_IDS = 64
+
+    def __init__(self, raw) -> None:
+        super().__init__()
+        self._raw = raw
+        self._hash = hashlib.sha256()
+        self._tail = b""
+        self._ids: Deque[Tuple[int, Tuple[bytes, bytes]]] = deque(maxlen=self._KEEP_IDS)
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        n = self._raw.write(b)
+        self._hash.update(b)
+        carry = self._tail[-self._OVERLAP :]
+        base = self.size - len(carry)
+        for m in _TRAILER_ID_RE.finditer(carry + bytes(b)):
+            offset = base + m.start()
+            if not self._ids or offset > self._ids[-1][0]:
+                self._ids.append((offset, (m.group(1), m.group(2))))
+        self.size += len(b)
+        if len(b) >= self._TAIL:
+            self._tail = bytes(b[-self._TAIL :])
+        else:
+            self._tail = (self._tail + bytes(b))[-self._TAIL :]
+        return n
+
+    def tell(self) -> int:
+        return self.size
+
+    def flush(self) -> None:
+        self._raw.flush()
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def trailer_id(self) -> Optional[List[Optional[str]]]:
+        """The ``/ID`` of the trailer (or xref stream) that ``startxref`` points at."""
+        m = _STARTXREF_RE.search(self._tail)
+        if m is None:
+            return None
+        xref = int(m.group(1))
+        found = [ids for offset, ids in self._ids if offset >= xref]
+        if not found:
+            return None
+        first, second = found[-1]
+        return [first.decode("ascii").lower(), second.decode("ascii").lower() or None]
 
 
 def _pikepdf():  # lazy import
@@ -26,17 +145,91 @@ def _pikepdf():  # lazy import
     return pikepdf
 
 
-def _pdf_save(pdf, out_path: Path) -> None:
-    sig = inspect.signature(pdf.save)
-    supported = {p.name for p in sig.parameters.values()}
-    opts = {}
-    if "linearize" in supported:
-        opts["linearize"] = True
-    if "compress_streams" in supported:
-        opts["compress_streams"] = True
-    if "fix_metadata_version" in supported:
-        opts["fix_metadata_version"] = False
-    pdf.save(str(out_path), **opts)
+def save_profile_for(preset: str | None, override: str | None = None) -> str:
+    """The save profile to use: ``override`` if given, else the preset's default."""
+    profile = override or PRESET_SAVE_PROFILES.get(preset or "", DEFAULT_SAVE_PROFILE)
+    if profile not in SAVE_PROFILES:
+        raise ValueError(f"Unknown save profile: {profile}")
+    return profile
+
+
+def _save_options(pdf, profile: str) -> Dict[str, Any]:
+    pikepdf = _pikepdf()
+    if profile == "web":
+        wanted: Dict[str, Any] = {"linearize": True, "compress_streams": True}
+    elif profile == "fast":
+        wanted = {
+            "linearize": False,
+            "compress_streams": False,
+            "stream_decode_level": pikepdf.StreamDecodeLevel.none,
+            "object_stream_mode": pikepdf.ObjectStreamMode.preserve,
+        }
+    elif profile == "compact":
+        wanted = {
+            "linearize": False,
+            "compress_streams": True,
+            "recompress_flate": True,
+            "stream_decode_level": pikepdf.StreamDecodeLevel.generalized,
+            "object_stream_mode": pikepdf.ObjectStreamMode.generate,
+        }
+    else:
+        raise ValueError(f"Unknown save profile: {profile}")
+    wanted["fix_metadata_version"] = False
+    supported = {p.name for p in inspect.signature(pdf.save).parameters.values()}
+    return {k: v for k, v in wanted.items() if k in supported}
+
+
+def _pdf_save(
+    pdf,
+    out_path: Path | BinaryIO | io.RawIOBase,
+    profile: str = DEFAULT_SAVE_PROFILE,
+    progress: Optional[Callable[[int], None]] = None,
+) -> None:
+    opts = _save_options(pdf, profile)
+    if progress is not None and "progress" in inspect.signature(pdf.save).parameters:
+        opts["progress"] = progress
+    pdf.save(out_path if hasattr(out_path, "write") else str(out_path), **opts)
+
+
+def _save_hashed(
+    pdf, fd: int, profile: str, timer: StageTimer, page_metadata_count: int
+) -> Dict[str, Any]:
+    """Save ``pdf`` to the open descriptor ``fd``; return the written file's state."""
+    with os.fdopen(fd, "wb") as f:
+        return _save_stream(pdf, f, profile, timer, page_metadata_count)
+
+
+def _save_stream(
+    pdf, out: BinaryIO, profile: str, timer: StageTimer, page_metadata_count: int
+) -> Dict[str, Any]:
+    """Save ``pdf`` to the binary stream ``out``; return the written state.
+
+    ``page_metadata_count`` comes from the ``_strip`` that preceded the save,
+    so the pages are not walked again.
+    """
+    with timer.stage("save"):
+        writer = _HashingWriter(out)
+        _pdf_save(pdf, writer, profile, timer.within("save", 40, 85))
+        writer.flush()
+    timer.bytes_written += writer.size
+    state: Dict[str, Any] = {"sha256": writer.hexdigest(), "size_bytes": writer.size}
+    with timer.stage("inspect"):
+        state.update(_inspect(pdf, pages=False))
+    state["page_metadata_count"] = page_metadata_count
+    # qpdf keeps /ID[0] but regenerates /ID[1] on save; report what was written
+    state["trailer_id"] = writer.trailer_id() or state["trailer_id"]
+    return state
+
+
+def _verify_written(path: Path, expected: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-read ``path`` in full and check it matches the state derived in memory."""
+    actual = read_state(path)
+    mismatched = sorted(k for k in expected if actual.get(k) != expected[k])
+    if mismatched:
+        raise RuntimeError(
+            f"verification failed for {path}: {', '.join(mismatched)} differ from written state"
+        )
+    return actual
 
 
 def _pdf_root(pdf):
@@ -52,6 +245,20 @@ def read_state(path: Path) -> Dict[str, Any]:
     out: Dict[str, Any] = {
         "sha256": _sha256(path),
         "size_bytes": path.stat().st_size,
+    }
+    with pikepdf.open(str(path)) as pdf:
+        out.update(_inspect(pdf))
+    return out
+
+
+def _inspect(pdf, pages: bool = True) -> Dict[str, Any]:
+    """State of an open document, minus the file-level ``sha256``/``size_bytes``.
+
+    With ``pages=False`` the page tree is not walked and ``page_metadata_count``
+    is left at 0 for the caller to fill in from ``_visit_pages``.
+    """
+    pikepdf = _pikepdf()
+    out: Dict[str, Any] = {
         "docinfo": {},
         "xmp_present": False,
         "trailer_id": None,
@@ -64,75 +271,110 @@ def read_state(path: Path) -> Dict[str, Any]:
         "acroform_present": False,
         "page_metadata_count": 0,
     }
-    with pikepdf.open(str(path)) as pdf:
-        try:
-            for k, v in pdf.docinfo.items():
+    try:
+        # Read /Info directly: pdf.docinfo would create an empty one when absent
+        info = pdf.trailer.get(pikepdf.Name("/Info"))
+        if isinstance(info, pikepdf.Dictionary):
+            for k, v in info.items():
                 out["docinfo"][str(k)] = str(v)
-        except Exception:
-            pass
+    except Exception:
+        pass
 
-        try:
-            tid = pdf.trailer.get(pikepdf.Name("/ID"))
-            if tid and isinstance(tid, pikepdf.Array) and len(tid) >= 1:
-                out["trailer_id"] = [
-                    bytes(tid[0]).hex(),
-                    bytes(tid[1]).hex() if len(tid) > 1 else None,
-                ]
-        except Exception:
-            pass
+    try:
+        tid = pdf.trailer.get(pikepdf.Name("/ID"))
+        if tid and isinstance(tid, pikepdf.Array) and len(tid) >= 1:
+            out["trailer_id"] = [
+                bytes(tid[0]).hex(),
+                bytes(tid[1]).hex() if len(tid) > 1 else None,
+            ]
+    except Exception:
+        pass
+
+    root = _pdf_root(pdf)
+    if root:
+        out["xmp_present"] = pikepdf.Name("/Metadata") in root
+        out["has_outlines"] = pikepdf.Name("/Outlines") in root
+        out["has_openaction"] = (
+            pikepdf.Name("/OpenAction") in root or pikepdf.Name("/AA") in root
+        )
+        out["has_viewer_prefs"] = pikepdf.Name("/ViewerPreferences") in root
+        if pikepdf.Name("/Lang") in root:
+            try:
+                out["lang"] = str(root[pikepdf.Name("/Lang")])
+            except Exception:
+                out["lang"] = True
 
-        root = _pdf_root(pdf)
-        if root:
-            out["xmp_present"] = pikepdf.Name("/Metadata") in root
-            out["has_outlines"] = pikepdf.Name("/Outlines") in root
-            out["has_openaction"] = (
-                pikepdf.Name("/OpenAction") in root or pikepdf.Name("/AA") in root
-            )
-            out["has_viewer_prefs"] = pikepdf.Name("/ViewerPreferences") in root
-            if pikepdf.Name("/Lang") in root:
+        js_count = 0
+        names = root.get(pikepdf.Name("/Names"))
+        if isinstance(names, pikepdf.Dictionary):
+            js = names.get(pikepdf.Name("/JavaScript"))
+            if isinstance(js, pikepdf.Dictionary) and pikepdf.Name("/Names") in js:
+                arr = js[pikepdf.Name("/Names")]
                 try:
-                    out["lang"] = str(root[pikepdf.Name("/Lang")])
+                    js_count = len(arr) // 2
                 except Exception:
-                    out["lang"] = True
-
-            js_count = 0
-            names = root.get(pikepdf.Name("/Names"))
-            if isinstance(names, pikepdf.Dictionary):
-                js = names.get(pikepdf.Name("/JavaScript"))
-                if isinstance(js, pikepdf.Dictionary) and pikepdf.Name("/Names") in js:
-                    arr = js[pikepdf.Name("/Names")]
-                    try:
-                        js_count = len(arr) // 2
-                    except Exception:
-                        js_count = 1
-            out["javascript_names"] = js_count
+                    js_count = 1
+        out["javascript_names"] = js_count
 
-        try:
-            for name in getattr(pdf, "attachments", {}).keys():
-                out["attachments"].append(str(name))
-        except Exception:
-            pass
+    try:
+        for name in getattr(pdf, "attachments", {}).keys():
+            out["attachments"].append(str(name))
+    except Exception:
+        pass
 
-        try:
-            cat = root if root else {}
-            acro = cat.get(pikepdf.Name("/AcroForm"))
-            out["acroform_present"] = bool(acro)
-        except Exception:
-            pass
+    try:
+        cat = root if root else {}
+        acro = cat.get(pikepdf.Name("/AcroForm"))
+        out["acroform_present"] = bool(acro)
+    except Exception:
+        pass
 
-        page_meta = 0
-        for page in pdf.pages:
-            obj = page.obj
-            for key in ("/Metadata", "/LastModified", "/PieceInfo"):
-                if key in obj:
-                    page_meta += 1
-                    break
-        out["page_metadata_count"] = page_meta
+    if pages:
+        out["page_metadata_count"] = _visit_pages(pdf, strip=False)[0]
 
     return out
 
 
-def _strip(pdf) -> None:
+# Page keys counted as page-level metadata, and the ones _strip removes
+_PAGE_METADATA_KEYS = ("/Metadata", "/LastModified", "/PieceInfo")
+_PAGE_STRIP_KEYS = _PAGE_METADATA_KEYS + ("/AA",)
+
+
+def _visit_pages(pdf, strip: bool) -> Tuple[int, int]:
+    """Walk the pages once, counting page-level metadata and, with ``strip``, removing it.
+
+    Returns how many pages carried metadata before the walk and how many still
+    do after it, so a sanitize pass gets both counts from a single traversal.
+    """
+    Name = _pikepdf().Name
+    counted = [Name(k) for k in _PAGE_METADATA_KEYS]
+    stripped = [Name(k) for k in _PAGE_STRIP_KEYS]
+    before = after = 0
+    for page in pdf.pages:
+        obj = page.obj
+        if any(k in obj for k in counted):
+            before += 1
+        if not strip:
+            continue
+        left = False
+        for k in stripped:
+            try:
+                if k in obj:
+                    del obj[k]
+            except Exception:
+                left = left or k in counted
+        after += left
+    if not strip:
+        after = before
+    return before, after
+
+
+def _strip(pdf, pages: bool = True) -> Tuple[int, int]:
+    """Remove everything the sanitizer targets from an open document.
+
+    Returns the ``_visit_pages`` counts: pages with metadata before and after
+    (both 0 when ``pages`` is false and the page tree is left alone).
+    """
     pikepdf = _pikepdf()
     Name = pikepdf.Name
 
@@ -193,14 +435,7 @@ def _strip(pdf) -> None:
             except Exception:
                 pass
 
-    for page in pdf.pages:
-        obj = page.obj
-        for k in ["/Metadata", "/LastModified", "/PieceInfo", "/AA"]:
-            try:
-                if pikepdf.Name(k) in obj:
-                    del obj[pikepdf.Name(k)]
-            except Exception:
-                pass
+    page_counts = _visit_pages(pdf, strip=True) if pages else (0, 0)
 
     try:
         for fname in list(getattr(pdf, "attachments", {}).keys()):
@@ -218,41 +453,184 @@ def _strip(pdf) -> None:
     except Exception:
         pass
 
+    return page_counts
 
-def sanitize_inplace(path: Path) -> Dict[str, Any]:
-    pikepdf = _pikepdf()
-    old_state = read_state(path)
 
-    tmp1 = Path(
-        tempfile.mkstemp(
-            prefix=path.stem + "_clean_", suffix=path.suffix, dir=str(path.parent)
-        )[1]
+def audit(path: Path, timer: StageTimer | None = None) -> Dict[str, Any]:
+    """What sanitizing ``path`` would remove, without writing anything.
+
+    Only the trailer, the catalog and what hangs off it (name trees,
+    attachments, AcroForm) are read: the page tree is not walked and the file
+    is neither hashed nor saved, so page-level metadata is not reported
+    ("page_metadata_count" is absent). "new" is the state after an in-memory
+    ``_strip``, minus the trailer /ID a real save would regenerate.
+    """
+    timer = timer or StageTimer()
+    pikepdf = _pikepdf()
+    with timer.stage("open"):
+        pdf = pikepdf.open(str(path), access_mode=pikepdf.AccessMode.stream)
+    with pdf:
+        with timer.stage("inspect"):
+            old_state: Dict[str, Any] = {"size_bytes": path.stat().st_size}
+            old_state.update(_inspect(pdf, pages=False))
+        with timer.stage("strip"):
+            _strip(pdf, pages=False)
+            new_state = _inspect(pdf, pages=False)
+    del old_state["page_metadata_count"], new_state["page_metadata_count"]
+    del new_state["trailer_id"]
+    return {"old": old_state, "new": new_state, "path": str(path)}
+
+
+def check_idempotent(path: Path) -> List[str]:
+    """Return the state keys a further ``_strip`` pass would still change.
+
+    An empty list proves the sanitized file at ``path`` is a fixed point: running
+    the sanitizer over it again removes nothing. The trailer ``/ID`` is ignored
+    since every pass refreshes it by design.
+    """
+    pikepdf = _pikepdf()
+    with pikepdf.open(str(path)) as pdf:
+        before = _inspect(pdf, pages=False)
+        before["page_metadata_count"], page_meta = _strip(pdf)
+        after = _inspect(pdf, pages=False)
+        after["page_metadata_count"] = page_meta
+    return sorted(k for k in before if k != "trailer_id" and before[k] != after[k])
+
+
+def sanitize_inplace(
+    path: Path,
+    passes: int = 1,
+    verify_idempotent: bool = False,
+    verify: str = "none",
+    timer: StageTimer | None = None,
+    save_profile: str = DEFAULT_SAVE_PROFILE,
+    durability: str = "none",
+) -> Dict[str, Any]:
+    """Strip ``path`` and atomically replace it with the result.
+
+    A single strip/save pass is enough: ``_strip`` removes everything it
+    targets in one go. ``passes=2`` restores the old strip, save, reopen, strip,
+    save cycle; ``verify_idempotent`` runs ``check_idempotent`` on the output
+    before it replaces the original and raises if anything is left to strip.
+
+    Both states come from the open document: "old" before stripping, "new"
+    after saving, with the output hashed as it is written. ``verify`` ("full",
+    "sample" or "none") controls whether the output is also re-read from disk
+    and checked against that in-memory state. Stage timings and byte counts
+    are added to ``timer`` when one is given.
+
+    ``save_profile`` picks the save options (see ``SAVE_PROFILES``) and
+    ``durability`` how the replacement is synced (see ``fileio.replace``).
+    """
+    return _sanitize(
+        path,
+        path,
+        passes,
+        verify_idempotent,
+        verify,
+        timer or StageTimer(),
+        save_profile,
+        durability,
     )
-    tmp2 = Path(
-        tempfile.mkstemp(
-            prefix=path.stem + "_clean2_", suffix=path.suffix, dir=str(path.parent)
-        )[1]
+
+
+def sanitize_to(
+    path: Path,
+    dest: Path,
+    passes: int = 1,
+    verify_idempotent: bool = False,
+    verify: str = "none",
+    timer: StageTimer | None = None,
+    save_profile: str = DEFAULT_SAVE_PROFILE,
+    durability: str = "none",
+) -> Dict[str, Any]:
+    """Export mode: read ``path`` and write the sanitized result straight to ``dest``.
+
+    The source is never copied; the temp file lives next to ``dest`` so the
+    final rename stays on the destination volume.
+    """
+    return _sanitize(
+        path,
+        dest,
+        passes,
+        verify_idempotent,
+        verify,
+        timer or StageTimer(),
+        save_profile,
+        durability,
     )
 
-    try:
-        with pikepdf.open(str(path), allow_overwriting_input=True) as pdf:
-            _strip(pdf)
-            _pdf_save(pdf, tmp1)
 
-        with pikepdf.open(str(tmp1)) as pdf2:
-            _strip(pdf2)
-            _pdf_save(pdf2, tmp2)
+def _sanitize(
+    path: Path,
+    dest: Path,
+    passes: int,
+    verify_idempotent: bool,
+    verify: str,
+    timer: StageTimer,
+    save_profile: str,
+    durability: str = "none",
+) -> Dict[str, Any]:
+    if save_profile not in SAVE_PROFILES:
+        raise ValueError(f"Unknown save profile: {save_profile}")
+    if durability not in fileio.DURABILITY_LEVELS:
+        raise ValueError(f"Unknown durability level: {durability}")
+    pikepdf = _pikepdf()
+    old_state: Dict[str, Any] = {}
+    new_state: Dict[str, Any] = {}
 
-        _atomic_replace(tmp2, path)
-        try:
-            tmp1.unlink(missing_ok=True)
-        except Exception:
-            pass
+    tmps: List[Path] = []
+    try:
+        src = path
+        for i in range(max(1, passes)):
+            with timer.stage("open"):
+                # Stream access reads the input on demand; qpdf's mmap mode
+                # would make the whole file resident and count it as RSS
+                pdf = pikepdf.open(str(src), access_mode=pikepdf.AccessMode.stream)
+            timer.bytes_read += src.stat().st_size
+            with pdf:
+                if src == path:
+                    with timer.stage("hash"):
+                        old_state = {"sha256": _sha256(path), "size_bytes": path.stat().st_size}
+                    timer.bytes_read += old_state["size_bytes"]
+                    with timer.stage("inspect"):
+                        old_state.update(_inspect(pdf, pages=False))
+                with timer.stage("strip"):
+                    page_meta, page_meta_left = _strip(pdf)
+                if src == path:
+                    old_state["page_metadata_count"] = page_meta
+                fd, name = tempfile.mkstemp(
+                    prefix=dest.stem + ("_clean_" if i == 0 else f"_clean{i + 1}_"),
+                    suffix=dest.suffix,
+                    dir=str(dest.parent),
+                )
+                tmps.append(Path(name))
+                new_state = _save_hashed(pdf, fd, save_profile, timer, page_meta_left)
+            src = tmps[-1]
+
+        if verify_idempotent:
+            with timer.stage("idempotence"):
+                residue = check_idempotent(src)
+            if residue:
+                raise RuntimeError(
+                    f"sanitize is not idempotent for {path}: {', '.join(residue)} still present"
+                )
+        if _should_verify(verify, dest):
+            with timer.stage("verify"):
+                new_state = _verify_written(src, new_state)
+            timer.bytes_read += 2 * new_state["size_bytes"]  # hash, then parse
+
+        with timer.stage("replace"):
+            _atomic_replace(src, dest, durability)
+        for p in tmps[:-1]:
+            try:
+                p.unlink(missing_ok=True)
+            except Exception:
+                pass
 
-        new_state = read_state(path)
-        return {"old": old_state, "new": new_state, "path": str(path)}
+        return {"old": old_state, "new": new_state, "path": str(dest)}
     except Exception:
-        for p in [tmp1, tmp2]:
+        for p in tmps:
             try:
                 if p.exists():
                     p.unlink(missing_ok=True)
@@ -261,9 +639,45 @@ def sanitize_inplace(path: Path) -> Dict[str, Any]:
         raise
 
 
-def sanitize_to(path: Path, dest: Path) -> Dict[str, Any]:
-    """Export mode: copy to dest then sanitize inplace on dest."""
-    # Copy file
-    dest.write_bytes(Path(path).read_bytes())
-    return sanitize_inplace(dest)
-
+def sanitize_stream(
+    src: BinaryIO,
+    dst: BinaryIO,
+    timer: StageTimer | None = None,
+    save_profile: str = DEFAULT_SAVE_PROFILE,
+) -> Dict[str, Any]:
+    """Sanitize the PDF read from ``src`` and write it to ``dst``; no files are touched.
+
+    The input is read into memory in full (qpdf needs random access); ``dst``
+    may be a pipe. Returns the "old" and "new" states.
+    """
+    if save_profile not in SAVE_PROFILES:
+        raise ValueError(f"Unknown save profile: {save_profile}")
+    timer = timer or StageTimer()
+    pikepdf = _pikepdf()
+    with timer.stage("read"):
+        data = src.read()
+    timer.bytes_read += len(data)
+    with timer.stage("open"):
+        pdf = pikepdf.open(io.BytesIO(data))
+    with pdf:
+        with timer.stage("hash"):
+            old_state: Dict[str, Any] = {
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "size_bytes": len(data),
+            }
+        with timer.stage("inspect"):
+            old_state.update(_inspect(pdf, pages=False))
+        with timer.stage("strip"):
+            old_state["page_metadata_count"], page_meta_left = _strip(pdf)
+        new_state = _save_stream(pdf, dst, save_profile, timer, page_meta_left)
+    return {"old": old_state, "new": new_state}
+
+
+def sanitize_bytes(
+    data: bytes, timer: StageTimer | None = None, save_profile: str = DEFAULT_SAVE_PROFILE
+) -> Dict[str, Any]:
+    """In-memory ``sanitize_stream``: returns "old", "new" and the sanitized "data"."""
+    out = io.BytesIO()
+    rep = sanitize_stream(io.BytesIO(data), out, timer=timer, save_profile=save_profile)
+    rep["data"] = out.getvalue()
+    return rep
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import json
+import sys
+import tempfile
+import textwrap
+import threading
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
 
 
 def now_iso() -> str:
@@ -21,6 +27,17 @@ class FileReport:
     duration_ms: Optional[int] = None
     preset: Optional[str] = None
     output_mode: Optional[str] = None
+    cached: bool = False  # served from the result cache; nothing was rewritten
+    save_profile: Optional[str] = None  # PDF save profile (fast|compact|web)
+    stages: Dict[str, float] = field(default_factory=dict)  # stage name -> ms
+    bytes_read: int = 0
+    bytes_written: int = 0
+
+
+def report_from_dict(data: Dict[str, Any]) -> FileReport:
+    """Rebuild a ``FileReport`` from its ``asdict`` form, ignoring unknown keys."""
+    known = {f.name for f in fields(FileReport)}
+    return FileReport(**{k: v for k, v in data.items() if k in known})
 
 
 def placeholder_report(path: str, kind: str, preset: str, output_mode: str) -> FileReport:
@@ -37,3 +54,99 @@ def placeholder_report(path: str, kind: str, preset: str, output_mode: str) -> F
         output_mode=output_mode,
     )
 
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+@dataclass(frozen=True, slots=True)
+class CompactReport:
+    """The part of a ``FileReport`` a session summary needs, kept small.
+
+    Repeated strings (type, preset, mode, action texts) are interned so every
+    report shares one copy. The full report, with its ``old``/``new`` state
+    snapshots, stays in the owning ``SessionReports`` spill file and is only
+    read back by ``SessionReports.full``.
+    """
+
+    document: str
+    type: str
+    actions: Tuple[str, ...]
+    errors: Optional[str]
+    preset: Optional[str]
+    output_mode: Optional[str]
+    duration_ms: Optional[int]
+    cached: bool
+    offset: int  # where the full report starts in the spill file
+    length: int
+
+
+class SessionReports:
+    """Reports for a long session, with full reports spilled to a temp file.
+
+    ``add`` appends each report as one compact JSON line to an anonymous
+    temporary file and keeps only a ``CompactReport`` in memory, so a session
+    of tens of thousands of files costs a few hundred bytes per file.
+    ``export`` streams the full reports back out without loading them all.
+    """
+
+    def __init__(self) -> None:
+        self._items: List[CompactReport] = []
+        self._spill: Optional[IO[bytes]] = None
+        self._lock = threading.Lock()  # the spill file has one shared position
+
+    def add(self, report: FileReport) -> CompactReport:
+        line = json.dumps(asdict(report), ensure_ascii=False, separators=(",", ":")).encode()
+        with self._lock:
+            if self._spill is None:
+                self._spill = tempfile.TemporaryFile(prefix="sanitize-session-")
+            offset = self._spill.seek(0, 2)
+            self._spill.write(line + b"\n")
+        item = CompactReport(
+            document=report.document,
+            type=sys.intern(report.type),
+            actions=tuple(sys.intern(a) for a in report.actions),
+            errors=report.errors,
+            preset=_intern(report.preset),
+            output_mode=_intern(report.output_mode),
+            duration_ms=report.duration_ms,
+            cached=report.cached,
+            offset=offset,
+            length=len(line),
+        )
+        self._items.append(item)
+        return item
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[CompactReport]:
+        return iter(self._items)
+
+    def _read(self, item: CompactReport) -> Dict[str, Any]:
+        assert self._spill is not None
+        with self._lock:
+            self._spill.seek(item.offset)
+            data = self._spill.read(item.length)
+        return json.loads(data)
+
+    def full(self, item: CompactReport) -> FileReport:
+        """The complete ``FileReport`` behind ``item``, read back from the spill file."""
+        return report_from_dict(self._read(item))
+
+    def export(self, path: Path) -> None:
+        """Write every full report to ``path`` as a JSON array, one report at a time.
+
+        The layout is the same as ``json.dumps(reports, indent=2)``.
+        """
+        with open(path, "w", encoding="utf-8") as out:
+            for i, item in enumerate(list(self._items)):
+                out.write("[\n" if i == 0 else ",\n")
+                out.write(textwrap.indent(json.dumps(self._read(item), indent=2), "  "))
+            out.write("\n]" if self._items else "[]")
+
+    def close(self) -> None:
+        self._items = []
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
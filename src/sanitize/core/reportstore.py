@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import abc
+import dataclasses
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, TextIO, Tuple
+
+from .report import FileReport, report_from_dict
+
+# Records buffered before they are written and synced in one go
+DEFAULT_BATCH_SIZE = 256
+# ...unless the oldest buffered record has waited this long (seconds)
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    document TEXT NOT NULL,
+    digest TEXT,
+    output_digest TEXT,
+    sanitized_at_utc TEXT NOT NULL,
+    report TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_document ON reports (document);
+CREATE INDEX IF NOT EXISTS reports_digest ON reports (digest);
+CREATE INDEX IF NOT EXISTS reports_output_digest ON reports (output_digest);
+"""
+
+
+def _digests(report: FileReport) -> Tuple[Optional[str], Optional[str]]:
+    # Input and output sha256: PDF states carry them, process_file(digests=True) adds the rest
+    return (report.old or {}).get("sha256"), (report.new or {}).get("sha256")
+
+
+def _matches(report: FileReport, document: str | None, digest: str | None) -> bool:
+    if document is not None and report.document != document:
+        return False
+    return digest is None or digest in _digests(report)
+
+
+class ReportStore(abc.ABC):
+    """Append-only store for the reports of many runs, instead of per-file sidecars.
+
+    ``add`` buffers reports; they are written and fsync'ed together once
+    ``batch_size`` are pending or, from a timer thread, once the oldest has
+    waited ``flush_interval`` seconds, and on ``flush``/``close``. ``find`` looks reports up by
+    document path and/or by sha256 (of the input or the output, where the
+    report carries one) and returns them oldest first. Use ``open_report_store``
+    to pick the JSONL or SQLite implementation from the file name.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ) -> None:
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[FileReport] = []
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def add(self, report: FileReport) -> None:
+        with self._lock:
+            self._pending.append(report)
+            full = len(self._pending) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending:
+                self._write(self._pending)
+                self._pending = []
+
+    def find(self, document: str | None = None, digest: str | None = None) -> List[FileReport]:
+        self.flush()
+        return list(self._find(document, digest))
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "ReportStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @abc.abstractmethod
+    def _write(self, reports: List[FileReport]) -> None:
+        """Append ``reports`` and sync them to disk."""
+
+    @abc.abstractmethod
+    def _find(self, document: str | None, digest: str | None) -> Iterator[FileReport]:
+        """Yield the stored reports matching ``document``/``digest``, oldest first."""
+
+
+class JsonlReportStore(ReportStore):
+    """One compact JSON report per line; lookups scan the file."""
+
+    _file: Optional[TextIO] = None
+
+    def _write(self, reports: List[FileReport]) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(
+            "".join(
+                json.dumps(dataclasses.asdict(r), ensure_ascii=False, separators=(",", ":"))
+                + "\n"
+                for r in reports
+            )
+        )
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _find(self, document: str | None, digest: str | None) -> Iterator[FileReport]:
+        if not self.path.exists():
+            return
+        # Cheap substring test first, so only candidate lines are parsed
+        needle = digest
+        if needle is None and document is not None:
+            needle = json.dumps(document, ensure_ascii=False)
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if needle is not None and needle not in line:
+                    continue
+                report = report_from_dict(json.loads(line))
+                if _matches(report, document, digest):
+                    yield report
+
+    def close(self) -> None:
+        super().close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SqliteReportStore(ReportStore):
+    """Reports in an SQLite table indexed by document path and digests."""
+
+    _conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Flushes may come from the timer thread; the lock serializes them
+            conn = sqlite3.connect(
+                str(self.path), timeout=30.0, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")  # writes are batched, so sync each one
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _write(self, reports: List[FileReport]) -> None:
+        rows = [
+            (
+                r.document,
+                *_digests(r),
+                r.sanitized_at_utc,
+                json.dumps(dataclasses.asdict(r), ensure_ascii=False, separators=(",", ":")),
+            )
+            for r in reports
+        ]
+        db = self._db()
+        with db:
+            db.execute("BEGIN")
+            db.executemany(
+                "INSERT INTO reports (document, digest, output_digest, sanitized_at_utc, report)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _find(self, document: str | None, digest: str | None) -> Iterator[FileReport]:
+        where: List[str] = []
+        params: List[Any] = []
+        if document is not None:
+            where.append("document = ?")
+            params.append(document)
+        if digest is not None:
+            where.append("(digest = ? OR output_digest = ?)")
+            params += [digest, digest]
+        sql = "SELECT report FROM reports"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        for (blob,) in self._db().execute(sql + " ORDER BY id", params):
+            yield report_from_dict(json.loads(blob))
+
+    def close(self) -> None:
+        super().close()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def open_report_store(path: Path, **kwargs: Any) -> ReportStore:
+    """A ``ReportStore`` for ``path``: SQLite for .sqlite/.sqlite3/.db, else JSONL."""
+    if Path(path).suffix.lower() in SQLITE_SUFFIXES:
+        return SqliteReportStore(path, **kwargs)
+    return JsonlReportStore(path, **kwargs)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .report import FileReport
+
+# progress(stage, percent): percent of the current file done, never decreasing
+ProgressCallback = Callable[[str, int], None]
+
+# Roughly how far through a file each stage starts, for progress reporting
+STAGE_PERCENT = {
+    "hash": 2,
+    "cache_lookup": 6,
+    "backup": 8,
+    "open": 12,
+    "inspect": 20,
+    "strip": 30,
+    "save": 40,
+    "write": 40,
+    "copy": 40,
+    "idempotence": 85,
+    "verify": 88,
+    "replace": 94,
+    "cache_store": 96,
+    "sidecar": 98,
+}
+
+
+class StageTimer:
+    """Wall time per named stage, plus bytes read and written, for one file.
+
+    Stages accumulate: timing the same name twice (one per pass, say) adds up.
+    With a ``progress`` callback, entering a stage also reports it along with
+    its ``STAGE_PERCENT``.
+    """
+
+    def __init__(self, progress: Optional[ProgressCallback] = None) -> None:
+        self._ms: Dict[str, float] = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._progress = progress
+        self._percent = 0
+
+    def advance(self, stage: str, percent: int) -> None:
+        """Report ``percent`` of the file done; ignored if it would go backwards."""
+        if self._progress is None or percent < self._percent:
+            return
+        self._percent = percent
+        self._progress(stage, percent)
+
+    def within(self, stage: str, start: int, end: int) -> Optional[Callable[[int], None]]:
+        """Callback mapping a sub-task's 0-100 progress onto ``start``..``end``.
+
+        None when nobody is listening, so callers can skip progress reporting.
+        """
+        if self._progress is None:
+            return None
+        return lambda pct: self.advance(stage, start + (end - start) * pct // 100)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self.advance(name, STAGE_PERCENT.get(name, self._percent))
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self._ms[name] = self._ms.get(name, 0.0) + elapsed
+
+    def stages(self) -> Dict[str, float]:
+        """Milliseconds per stage, in the order the stages first ran."""
+        return {k: round(v, 3) for k, v in self._ms.items()}
+
+
+class StageSummary:
+    """Aggregates the stage timings of many reports, for ``--profile``."""
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.cached = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.total_ms: Dict[str, float] = {}
+        self.max_ms: Dict[str, float] = {}
+
+    def add(self, report: FileReport) -> None:
+        self.files += 1
+        self.cached += bool(report.cached)
+        self.bytes_read += report.bytes_read
+        self.bytes_written += report.bytes_written
+        for name, ms in report.stages.items():
+            self.total_ms[name] = self.total_ms.get(name, 0.0) + ms
+            self.max_ms[name] = max(self.max_ms.get(name, 0.0), ms)
+
+    def format(self) -> str:
+        grand = sum(self.total_ms.values()) or 1.0
+        lines: List[str] = [
+            f"{self.files} files ({self.cached} cached), "
+            f"{self.bytes_read / 1e6:.1f} MB read, {self.bytes_written / 1e6:.1f} MB written",
+            f"{'stage':<14}{'total ms':>12}{'mean ms':>10}{'max ms':>10}{'share':>8}",
+        ]
+        for name, total in sorted(self.total_ms.items(), key=lambda kv: -kv[1]):
+            lines.append(
+                f"{name:<14}{total:>12.1f}{total / max(self.files, 1):>10.2f}"
+                f"{self.max_ms[name]:>10.2f}{total / grand:>8.1%}"
+            )
+        return "\n".join(lines)
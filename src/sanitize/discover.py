@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import fnmatch
+import logging
+import os
+from glob import iglob
+from itertools import chain
+from pathlib import Path
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from .watch import DOC_SUFFIXES
+
+log = logging.getLogger("sanitize.discover")
+
+
+def _matches(patterns: Sequence[str], name: str, rel: str) -> bool:
+    # Patterns containing "/" match the path below the root, others the name
+    return any(fnmatch.fnmatch(rel if "/" in pat else name, pat) for pat in patterns)
+
+
+def _walk(
+    root: str, include: Sequence[str], exclude: Sequence[str], suffixes: Sequence[str]
+) -> Iterator[Path]:
+    """Depth-first ``os.scandir`` walk yielding documents as they are found.
+
+    Entry types come from the directory listing itself, and names are checked
+    against ``suffixes`` and the patterns before anything else, so files that
+    are not wanted are never stat'ed. Symlinked directories are not followed.
+    """
+    wanted = tuple(s.lower() for s in suffixes)
+    stack: List[Tuple[str, str]] = [(root, "")]  # (directory, its path below root + "/")
+    while stack:
+        top, prefix = stack.pop()
+        subdirs: List[Tuple[str, str]] = []
+        try:
+            with os.scandir(top) as it:
+                for entry in it:
+                    name = entry.name
+                    if exclude and _matches(exclude, name, prefix + name):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append((entry.path, prefix + name + "/"))
+                            continue
+                        if not name.lower().endswith(wanted):
+                            continue
+                        if include and not _matches(include, name, prefix + name):
+                            continue
+                        if entry.is_file():
+                            yield Path(entry.path)
+                    except OSError:
+                        continue
+        except OSError as e:
+            log.warning("Cannot read directory %s: %s", top, e)
+            continue
+        stack.extend(reversed(subdirs))  # visit subdirectories in listing order
+
+
+def iter_documents(
+    paths: Iterable[str],
+    recursive: bool = False,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    suffixes: Sequence[str] = DOC_SUFFIXES,
+) -> Iterator[Path]:
+    """Expand command-line ``paths`` (files, globs, directories) lazily.
+
+    Directories are only descended into with ``recursive``, and only files
+    with one of ``suffixes`` are taken from them. Files named explicitly or
+    matched by a glob are yielded whatever their type, so the caller can say
+    why it skips them. ``include`` and ``exclude`` are shell-style patterns
+    matched against the file name, or, if they contain "/", against the path
+    below the directory being walked (as given, for files); an excluded
+    directory is not entered.
+    """
+    for pat in paths:
+        if os.path.isdir(pat):
+            if recursive:
+                yield from _walk(pat, include, exclude, suffixes)
+            continue
+        names = iglob(pat)
+        first = next(names, None)
+        if first is None:
+            # Not a glob match; may still be a file whose name looks like one
+            names, first = iter(()), pat
+        for name in chain([first], names):
+            base = os.path.basename(name)
+            if exclude and _matches(exclude, base, name):
+                continue
+            if include and not _matches(include, base, name):
+                continue
+            if os.path.isfile(name):
+                yield Path(name)
@@ -2,14 +2,73 @@ from __future__ import annotations
 
 import json
 import threading
-import time
 import uuid
+from concurrent.futures import CancelledError
 from dataclasses import dataclass, asdict
 from pathlib import Path
 from typing import List, Dict, Any
 
-from ..core.ops import process_file
-from ..core.report import FileReport
+from ..core.batch import resolve_jobs, run_batch
+from ..core.report import FileReport, SessionReports, now_iso
+
+# One evaluate_js per frame at most, however fast progress events arrive
+_FRAME_SECONDS = 1 / 30
+
+
+class _UIPump:
+    """Coalesces progress updates into at most one ``evaluate_js`` per frame.
+
+    ``update`` only records the latest values; a background thread pushes
+    whatever changed since the last frame in a single script.
+    """
+
+    def __init__(self, window, interval: float = _FRAME_SECONDS) -> None:
+        self._window = window
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._state: Dict[str, Any] = {}
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sanitize-ui", daemon=True)
+        self._thread.start()
+
+    def update(self, **fields: Any) -> None:
+        with self._lock:
+            self._state.update(fields)
+            self._dirty = True
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            state = dict(self._state)
+            self._dirty = False
+        js = []
+        if "detail" in state:
+            js.append(f"document.getElementById('status-detail').textContent={json.dumps(state['detail'])};")
+        if "count" in state:
+            js.append(f"document.getElementById('progress-count').textContent={json.dumps(state['count'])};")
+        if "percent" in state:
+            pct = int(state["percent"])
+            js.append(
+                f"document.getElementById('progress-fill').style.width='{pct}%';"
+                f"document.querySelector('.progress-bar').setAttribute('aria-valuenow','{pct}');"
+            )
+        if js:
+            self._window.evaluate_js("".join(js))
+
+    def close(self) -> None:
+        """Stop the pump thread and push the final state."""
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.flush()
+            except Exception:
+                pass  # window closed mid-batch
 
 
 @dataclass
@@ -33,7 +92,9 @@ class Bridge:
         self.mode: str = "replace"
         self.out_dir: str | None = None
         self._window = None
-        self._results: List[FileReport] = []
+        self._results = SessionReports()
+        self._cancel = threading.Event()
+        self._running: threading.Thread | None = None
 
     def set_window(self, window) -> None:  # pragma: no cover (UI)
         self._window = window
@@ -85,9 +146,16 @@ class Bridge:
         return out
 
     def start_processing(self) -> None:  # pragma: no cover (UI)
-        if not self._window:
+        if not self._window or (self._running and self._running.is_alive()):
             return
-        threading.Thread(target=self._worker, daemon=True).start()
+        self._cancel.clear()
+        self._running = threading.Thread(target=self._worker, daemon=True)
+        self._running.start()
+
+    def cancel_processing(self) -> None:  # pragma: no cover (UI)
+        """Stop the batch: files not yet started are skipped, files in flight
+        stop at their next stage and remove their temp files."""
+        self._cancel.set()
 
     def export_report(self) -> str:  # pragma: no cover (UI)
         if not self._results:
@@ -95,48 +163,85 @@ class Bridge:
         out_dir = Path.home() / "sanitize"
         out_dir.mkdir(parents=True, exist_ok=True)
         out_path = out_dir / "session-report.json"
-        out_path.write_text(json.dumps([asdict(r) for r in self._results], indent=2), encoding="utf-8")
+        self._results.export(out_path)
         return str(out_path)
 
     # --- internals ---
     def _worker(self) -> None:  # pragma: no cover (UI)
         win = self._window
-        total = len(self.files)
-        idx = 0
-        self._results = []
+        files = list(self.files)
+        total = len(files)
+        self._results.close()
+        self._results = SessionReports()
         win.evaluate_js("setState('processing')")
-        for f in self.files:
-            idx += 1
-            win.evaluate_js(f"document.getElementById('status-detail').textContent='Processing {f.name.replace("'"," ")}';")
-            win.evaluate_js(f"document.getElementById('progress-count').textContent='{idx - 1} of {total} complete';")
+        pump = _UIPump(win)
+        names = {Path(f.path): f.name for f in files}
+        inflight: Dict[Path, int] = {}
+        finished = 0
+        failed: List[str] = []
+        cancelled = 0
 
-            # Simulated progress bar steps (UI nicety)
-            for percent in (10, 30, 55, 80, 100):
-                win.evaluate_js(f"document.getElementById('progress-fill').style.width='{percent}%';document.querySelector('.progress-bar').setAttribute('aria-valuenow','{percent}');")
-                time.sleep(0.15)
+        def _progress(path: Path, stage: str, percent: int) -> None:
+            inflight[path] = percent
+            overall = (finished * 100 + sum(inflight.values())) // max(total, 1)
+            pump.update(detail=f"Processing {names.get(path, path.name)}", percent=overall)
 
-            try:
-                rep = process_file(
-                    Path(f.path),
-                    preset=self.preset,
-                    mode=self.mode,
-                    out_dir=Path(self.out_dir) if self.out_dir else None,
-                    sidecar=True,
-                    dry_run=False,
+        pump.update(detail="Preparing…", count=f"0 of {total} complete", percent=0)
+        results = run_batch(
+            [Path(f.path) for f in files],
+            jobs=min(resolve_jobs("auto"), max(total, 1)),
+            cancel=self._cancel,
+            progress=_progress,
+            start_method="spawn",  # pywebview and the UI pump are running threads
+            preset=self.preset,
+            mode=self.mode,
+            out_dir=Path(self.out_dir) if self.out_dir else None,
+            sidecar=True,
+            dry_run=False,
+        )
+        try:
+            for path, rep, err in results:
+                inflight.pop(path, None)
+                finished += 1
+                if isinstance(err, CancelledError):
+                    cancelled += 1
+                elif err is not None:
+                    failed.append(f"{names.get(path, path.name)}: {err}")
+                    self._results.add(
+                        FileReport(
+                            sanitized_at_utc=now_iso(),
+                            document=str(path),
+                            type=self._kind_from_ext(path.suffix),
+                            errors=str(err),
+                            preset=self.preset,
+                            output_mode=self.mode,
+                        )
+                    )
+                else:
+                    assert rep is not None
+                    self._results.add(rep)
+                pump.update(
+                    count=f"{finished} of {total} complete",
+                    percent=finished * 100 // max(total, 1),
                 )
-                self._results.append(rep)
-            except Exception as e:
-                # Surface error and stop
-                msg = str(e).replace("'", " ")
-                win.evaluate_js(f"document.getElementById('error-title').textContent='Processing Failed';document.getElementById('error-message').textContent='{msg}';setState('error');")
-                return
+        finally:
+            results.close()
+            pump.close()
+
+        if failed and len(failed) == total:
+            win.evaluate_js(
+                "document.getElementById('error-title').textContent='Processing Failed';"
+                f"document.getElementById('error-message').textContent={json.dumps(failed[0])};"
+                "setState('error');"
+            )
+            return
 
         # Complete
-        files = len(self._results)
-        removed = sum(len(r.actions) for r in self._results)
+        done = [r for r in self._results if not r.errors]
+        removed = sum(len(r.actions) for r in done)
         clean_pct = "100%"  # heuristic placeholder; could compute based on diffs
         win.evaluate_js(
-            f"document.getElementById('stat-files').textContent='{files}';"
+            f"document.getElementById('stat-files').textContent='{len(done)}';"
             f"document.getElementById('stat-removed').textContent='{removed}';"
             f"document.getElementById('stat-clean').textContent='{clean_pct}';"
             "setState('complete');"
@@ -149,7 +254,7 @@ class Bridge:
             payload = [
                 {
                     "name": Path(r.document).name,
-                    "actions": r.actions,
+                    "actions": r.actions if not r.errors else [f"Failed: {r.errors}"],
                 }
                 for r in self._results
             ]
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from .core.batch import run_batch, worker_pool
+from .core.cache import ResultCache
+
+# Request fields forwarded to process_file; "paths" carries the files
+REQUEST_FIELDS = (
+    "preset",
+    "mode",
+    "out_dir",
+    "sidecar",
+    "dry_run",
+    "verify",
+    "chunk_size",
+    "save_profile",
+    "audit",
+    "durability",
+    "digests",
+)
+
+log = logging.getLogger("sanitize.server")
+
+
+def _process_kwargs(request: Dict[str, Any]) -> Dict[str, Any]:
+    unknown = set(request) - set(REQUEST_FIELDS) - {"paths"}
+    if unknown:
+        raise ValueError(f"unknown request fields: {', '.join(sorted(unknown))}")
+    kwargs = {k: request[k] for k in REQUEST_FIELDS if request.get(k) is not None}
+    if "out_dir" in kwargs:
+        kwargs["out_dir"] = Path(kwargs["out_dir"])
+    return kwargs
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "SanitizeServer"
+
+    def handle(self) -> None:
+        # One JSON request per line; each answered with one line per file and a summary
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                self._serve(json.loads(line))
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+    def _send(self, obj: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    def _serve(self, request: Any) -> None:
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get("paths"), list):
+                raise ValueError('request must be an object with a "paths" list')
+            kwargs = _process_kwargs(request)
+        except ValueError as e:
+            self._send({"error": str(e), "done": True, "ok": 0, "failed": 0})
+            return
+
+        ok = failed = 0
+        results = run_batch(
+            [Path(p) for p in request["paths"]],
+            jobs=self.server.jobs,
+            pool=self.server.pool,
+            cache=self.server.cache,
+            memory_budget=self.server.memory_budget,
+            **kwargs,
+        )
+        try:
+            for path, rep, err in results:
+                if err is not None:
+                    failed += 1
+                    self._send({"document": str(path), "error": str(err)})
+                else:
+                    assert rep is not None
+                    ok += 1
+                    self._send(asdict(rep))
+        finally:
+            results.close()
+            if self.server.cache is not None:
+                self.server.cache.prune()  # the workers only insert
+        self._send({"done": True, "ok": ok, "failed": failed})
+
+
+class SanitizeServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Resident sanitizer: a warm worker pool behind a Unix socket.
+
+    Clients send newline-delimited JSON requests of the form
+    ``{"paths": [...], "preset": ..., "mode": ..., ...}`` (any ``process_file``
+    option in ``REQUEST_FIELDS``; paths are resolved by the server, so send
+    absolute ones). Each file's ``FileReport`` is streamed back as one JSON
+    line as soon as it is ready, or ``{"document", "error"}`` if it failed,
+    followed by ``{"done": true, "ok": N, "failed": M}``. Connections are
+    served concurrently and share the pool. ``memory_budget`` applies to each
+    request's batch, as in ``run_batch``.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: Path,
+        jobs: int,
+        cache: ResultCache | None = None,
+        memory_budget: int | None = None,
+    ) -> None:
+        self.socket_path = Path(socket_path)
+        self.jobs = jobs
+        self.cache = cache
+        self.memory_budget = memory_budget
+        _remove_stale_socket(self.socket_path)
+        super().__init__(str(self.socket_path), _Handler)
+        os.chmod(self.socket_path, 0o600)  # the daemon rewrites files as its own user
+        self.pool = worker_pool(jobs)
+        # Start the workers now so the first request does not pay for it
+        for fut in [self.pool.submit(os.getpid) for _ in range(jobs)]:
+            fut.result()
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        if self.cache is not None:
+            self.cache.close()
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _remove_stale_socket(path: Path) -> None:
+    if not path.exists():
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        path.unlink()  # left behind by a daemon that did not shut down cleanly
+    else:
+        raise OSError(f"a sanitize daemon is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def serve(
+    socket_path: Path,
+    jobs: int,
+    cache: ResultCache | None = None,
+    memory_budget: int | None = None,
+) -> None:
+    """Run a ``SanitizeServer`` until interrupted (Ctrl-C or SIGTERM)."""
+
+    def _terminate(signum: int, frame: Any) -> None:
+        raise KeyboardInterrupt
+
+    with SanitizeServer(socket_path, jobs, cache, memory_budget) as server:
+        # Installed once the workers exist, so they keep the default handler
+        signal.signal(signal.SIGTERM, _terminate)
+        log.info("Serving on %s with %d workers", socket_path, jobs)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def request(socket_path: Path, paths: List[str], **options: Any) -> Iterator[Dict[str, Any]]:
+    """Send one request to a running daemon and yield its reply lines.
+
+    Yields a report (or error) dict per file; the trailing summary line is
+    consumed, not yielded.
+    """
+    msg: Dict[str, Any] = {"paths": [os.path.abspath(p) for p in paths]}
+    for key, value in options.items():
+        if value is None:
+            continue
+        msg[key] = os.path.abspath(value) if key == "out_dir" else value
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(msg).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as replies:
+            for line in replies:
+                reply = json.loads(line)
+                if reply.get("done"):
+                    if "error" in reply:
+                        raise ValueError(reply["error"])
+                    return
+                yield reply
+    raise ConnectionError(f"daemon at {socket_path} closed the connection mid-request")
+
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import queue
+import re
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+DOC_SUFFIXES = (".pdf", ".docx")
+DEFAULT_SETTLE = 2.0
+DEFAULT_POLL_INTERVAL = 5.0
+DEFAULT_QUEUE_SIZE = 256
+
+# Temp files the sanitizers create next to their output (tempfile.mkstemp names)
+_TEMP_NAME = re.compile(r"_clean\d*_[A-Za-z0-9_]{8}\.(pdf|docx)$", re.IGNORECASE)
+
+# (size, mtime_ns) used to tell whether a file is still being written
+_Sig = Tuple[int, int]
+
+log = logging.getLogger("sanitize.watch")
+
+
+def _sig(path: Path) -> Optional[_Sig]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _is_candidate(path: Path) -> bool:
+    name = path.name
+    return (
+        path.suffix.lower() in DOC_SUFFIXES
+        and not name.startswith((".", "~$"))
+        and not _TEMP_NAME.search(name)
+    )
+
+
+def _scan(root: Path, recursive: bool) -> Iterator[Path]:
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        yield from _scan(Path(entry.path), recursive)
+                elif entry.is_file():
+                    yield Path(entry.path)
+    except OSError:
+        return
+
+
+class _PollingSource:
+    """Finds new or changed files by rescanning the roots every ``interval`` seconds."""
+
+    def __init__(self, roots: List[Path], recursive: bool, interval: float) -> None:
+        self.roots = roots
+        self.recursive = recursive
+        self.interval = interval
+        self._seen: Dict[Path, Optional[_Sig]] = {}
+        self._next = 0.0
+
+    def poll(self, timeout: float) -> List[Path]:
+        now = time.monotonic()
+        if now < self._next:
+            time.sleep(min(timeout, self._next - now))
+            return []
+        self._next = now + self.interval
+        changed = []
+        current: Dict[Path, Optional[_Sig]] = {}
+        for root in self.roots:
+            for path in _scan(root, self.recursive):
+                if not _is_candidate(path):
+                    continue
+                sig = current[path] = _sig(path)
+                if self._seen.get(path) != sig:
+                    changed.append(path)
+        self._seen = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifySource:
+    """Linux inotify: reports files as they are closed after writing or moved in."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    _MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, roots: List[Path], recursive: bool) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = roots
+        self.recursive = recursive
+        self._dirs: Dict[int, Path] = {}
+        for root in roots:
+            self._add_tree(root)
+
+    def _add(self, d: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(d), self._MASK)
+        if wd < 0:
+            log.warning("Cannot watch %s: %s", d, os.strerror(ctypes.get_errno()))
+            return
+        self._dirs[wd] = d
+
+    def _add_tree(self, root: Path) -> None:
+        self._add(root)
+        if self.recursive:
+            for dirpath, _dirs, _files in os.walk(root):
+                if Path(dirpath) != root:
+                    self._add(Path(dirpath))
+
+    def poll(self, timeout: float) -> List[Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        changed: List[Path] = []
+        i = 0
+        while i + self._EVENT.size <= len(buf):
+            wd, mask, _cookie, length = self._EVENT.unpack_from(buf, i)
+            raw_name = buf[i + self._EVENT.size : i + self._EVENT.size + length].rstrip(b"\0")
+            i += self._EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were dropped; fall back to a full rescan
+                for root in self.roots:
+                    changed.extend(_scan(root, self.recursive))
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None or not raw_name:
+                continue
+            path = parent / os.fsdecode(raw_name)
+            if mask & self.IN_ISDIR:
+                if self.recursive and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self._add_tree(path)
+                    # Files may have landed before the watch existed
+                    changed.extend(_scan(path, True))
+            elif mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO):
+                changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class DropWatcher:
+    """Watch directories and yield documents once they have stopped changing.
+
+    Uses inotify on Linux and falls back to rescanning every ``poll_interval``
+    seconds elsewhere (or when ``poll_interval`` is given explicitly). A file
+    is handed out once its size and mtime have been stable for ``settle``
+    seconds, through a queue of at most ``queue_size`` paths: when consumers
+    fall behind, the watcher blocks instead of buffering without bound.
+
+    Iterate the watcher (or call ``get``) to receive paths; call ``mark_done``
+    after each one so the sanitizer's own rewrite of that file is not picked
+    up as a new drop.
+    """
+
+    def __init__(
+        self,
+        roots: Iterable[Path],
+        recursive: bool = False,
+        settle: float = DEFAULT_SETTLE,
+        poll_interval: float | None = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        exclude: Iterable[Path] = (),
+    ) -> None:
+        self.roots = [Path(r).resolve() for r in roots]
+        self.recursive = recursive
+        self.settle = settle
+        self.exclude = [Path(e).resolve() for e in exclude]
+        self._queue: "queue.Queue[Optional[Path]]" = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._done: Dict[Path, Optional[_Sig]] = {}
+        self._inflight: Set[Path] = set()
+        self._source = self._make_source(poll_interval)
+        self._thread = threading.Thread(target=self._run, name="sanitize-watch", daemon=True)
+
+    def _make_source(self, poll_interval: float | None):
+        if poll_interval is None and sys.platform.startswith("linux"):
+            try:
+                return _InotifySource(self.roots, self.recursive)
+            except (OSError, AttributeError) as e:
+                log.info("inotify unavailable (%s); polling instead", e)
+        return _PollingSource(self.roots, self.recursive, poll_interval or DEFAULT_POLL_INTERVAL)
+
+    def start(self) -> "DropWatcher":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def mark_done(self, path: Path) -> None:
+        path = Path(path).resolve()
+        self._done[path] = _sig(path)
+        self._inflight.discard(path)
+
+    def get(self, timeout: float | None = None) -> Optional[Path]:
+        """The next settled drop, waiting at most ``timeout`` seconds.
+
+        Raises ``queue.Empty`` when nothing arrived in time, and returns None
+        once the watcher has stopped (where iteration would end).
+        """
+        path = self._queue.get(timeout=timeout)
+        if path is None:
+            self._queue.put(None)  # later calls see the end too
+        return path
+
+    def __iter__(self) -> Iterator[Path]:
+        while True:
+            path = self._queue.get()
+            if path is None:
+                return
+            yield path
+
+    def _excluded(self, path: Path) -> bool:
+        return any(path == e or e in path.parents for e in self.exclude)
+
+    def _run(self) -> None:
+        pending: Dict[Path, Tuple[float, Optional[_Sig]]] = {}
+        try:
+            # Documents dropped while we were not running count as new drops
+            for root in self.roots:
+                for path in _scan(root, self.recursive):
+                    path = path.resolve()
+                    if _is_candidate(path) and not self._excluded(path):
+                        pending[path] = (time.monotonic(), _sig(path))
+
+            while not self._stop.is_set():
+                for path in self._source.poll(timeout=min(self.settle, 0.5) or 0.05):
+                    path = path.resolve()
+                    if _is_candidate(path) and not self._excluded(path):
+                        pending[path] = (time.monotonic(), _sig(path))
+
+                now = time.monotonic()
+                for path, (since, sig) in list(pending.items()):
+                    if now - since < self.settle:
+                        continue
+                    current = _sig(path)
+                    if current is None:
+                        del pending[path]  # gone (moved away, or one of our temp files)
+                    elif current != sig:
+                        pending[path] = (now, current)  # still being written
+                    elif path in self._inflight or self._done.get(path) == current:
+                        del pending[path]  # our own output, or already queued
+                    else:
+                        del pending[path]
+                        self._inflight.add(path)
+                        self._put(path)
+        finally:
+            self._source.close()
+            self._put(None)
+
+    def _put(self, item: Optional[Path]) -> None:
+        while True:
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                if self._stop.is_set() and item is not None:
+                    return
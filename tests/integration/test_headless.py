@@ -1,3 +1,4 @@
+import hashlib
 import json
 from pathlib import Path
 
@@ -6,7 +7,8 @@ import pytest
 pytest.importorskip("pikepdf")
 
 from sanitize.app import headless_main
-from .unit.test_pdf import make_sample_pdf
+from ..unit.test_docx import make_min_docx
+from ..unit.test_pdf import make_sample_pdf, make_sample_pdfs
 
 
 def test_headless_jsonl(tmp_path, capsys):
@@ -21,3 +23,60 @@ def test_headless_jsonl(tmp_path, capsys):
     assert data["document"].endswith("x.pdf")
     assert data["type"] == "pdf"
 
+
+
+def test_headless_jobs_keeps_input_order(tmp_path, capsys):
+    paths = [str(p) for p in make_sample_pdfs(tmp_path, 4, "x")]
+    out_dir = str(tmp_path / "out")
+    code = headless_main(["--jobs", "2", "--mode", "export", "--out-dir", out_dir, *paths])
+    captured = capsys.readouterr()
+    assert code == 0
+    docs = [json.loads(line)["document"] for line in captured.out.strip().splitlines()]
+    assert docs == paths
+
+
+def test_headless_json_array_streams_valid_array(tmp_path, capsys):
+    paths = [str(p) for p in make_sample_pdfs(tmp_path, 2, "y")]
+    code = headless_main(["--json-array", "--no-sidecar", *paths])
+    out = capsys.readouterr().out
+    assert code == 0
+    data = json.loads(out)
+    assert [d["document"] for d in data] == paths
+    assert out == json.dumps(data, indent=2) + "\n"
+
+
+def test_headless_audit_writes_nothing(tmp_path, capsys):
+    p = tmp_path / "a.pdf"
+    make_sample_pdf(p)
+    d = tmp_path / "b.docx"
+    make_min_docx(d)
+    before = {f: f.read_bytes() for f in (p, d)}
+    code = headless_main(["--audit", "--jobs", "2", str(p), str(d)])
+    out = capsys.readouterr().out
+    assert code == 0
+    reports = [json.loads(line) for line in out.strip().splitlines()]
+    assert [r["output_mode"] for r in reports] == ["audit", "audit"]
+    assert all(r["actions"] for r in reports)
+    assert sorted(tmp_path.iterdir()) == sorted(before)
+    assert all(f.read_bytes() == data for f, data in before.items())
+
+
+def test_headless_report_store_replaces_sidecars(tmp_path, capsys):
+    from sanitize.core.reportstore import open_report_store
+
+    paths = [str(p) for p in make_sample_pdfs(tmp_path, 3, "z")]
+    d = tmp_path / "z3.docx"
+    make_min_docx(d)
+    paths.append(str(d))
+    store_path = tmp_path / "reports.sqlite"
+    assert headless_main(["--report-store", str(store_path), *paths]) == 0
+    capsys.readouterr()
+    assert not list(tmp_path.glob("*.sanitize.json"))
+    with open_report_store(store_path) as store:
+        assert [r.document for r in store.find()] == paths
+        # DOCX reports are found by digest too
+        digest = hashlib.sha256(d.read_bytes()).hexdigest()
+        assert [r.document for r in store.find(digest=digest)] == [str(d)]
+
+    assert headless_main(["--report-store", str(store_path), "--sidecar", paths[0]]) == 0
+    assert (tmp_path / "z0.pdf.sanitize.json").exists()
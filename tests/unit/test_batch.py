@@ -0,0 +1,132 @@
+import threading
+from concurrent.futures import CancelledError
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pikepdf")
+
+from sanitize.core.batch import resolve_jobs, run_batch, worker_pool
+
+from .test_docx import make_min_docx
+from .test_pdf import make_sample_pdf, make_sample_pdfs
+
+
+def test_resolve_jobs():
+    assert resolve_jobs("3") == 3
+    assert resolve_jobs("auto") >= 1
+    with pytest.raises(ValueError):
+        resolve_jobs("0")
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_run_batch_pool_matches_serial(tmp_path: Path, ordered: bool):
+    files = make_sample_pdfs(tmp_path, 3)
+    d = tmp_path / "e.docx"
+    make_min_docx(d)
+    files.append(d)
+    missing = tmp_path / "missing.pdf"
+    files.append(missing)
+
+    out_dir = tmp_path / "out"
+    results = list(run_batch(files, jobs=2, ordered=ordered, mode="export", out_dir=out_dir))
+    assert len(results) == len(files)
+    if ordered:
+        assert [r[0] for r in results] == files
+
+    by_path = {path: (rep, err) for path, rep, err in results}
+    rep, err = by_path[missing]
+    assert rep is None and err is not None
+    for f in files[:-1]:
+        rep, err = by_path[f]
+        assert err is None
+        assert rep.actions
+        assert (out_dir / f.name).exists()
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_batch_profile_dir(tmp_path: Path, jobs: int):
+    p = tmp_path / "a.pdf"
+    make_sample_pdf(p)
+    prof = tmp_path / "prof"
+    results = list(run_batch([p], jobs=jobs, profile_dir=prof, sidecar=False))
+    assert results[0][2] is None
+    assert list(prof.glob("worker-*.prof"))
+
+
+# "spawn" is how the GUI runs it, from a process that already has threads
+@pytest.mark.parametrize("jobs, start_method", [(1, None), (2, None), (2, "spawn")])
+def test_run_batch_progress_and_cancel(tmp_path: Path, jobs: int, start_method):
+    files = make_sample_pdfs(tmp_path, 6)
+    originals = {p: p.read_bytes() for p in files}
+
+    cancel = threading.Event()
+    seen = []
+
+    def progress(path: Path, stage: str, percent: int) -> None:
+        seen.append((path, stage))
+        if path == files[1]:
+            cancel.set()
+
+    results = list(
+        run_batch(
+            files,
+            jobs=jobs,
+            cancel=cancel,
+            progress=progress,
+            start_method=start_method,
+            sidecar=False,
+        )
+    )
+    assert [r[0] for r in results] == files
+    assert results[0][2] is None or isinstance(results[0][2], CancelledError)
+    assert (files[0], "done") in seen or jobs > 1
+    cancelled = [path for path, _rep, err in results if isinstance(err, CancelledError)]
+    assert files[-1] in cancelled
+    for path in cancelled:
+        assert path.read_bytes() == originals[path]
+    assert not list(tmp_path.glob("*_clean_*"))
+
+
+def test_run_batch_memory_budget_limits_concurrency(tmp_path: Path):
+    files = make_sample_pdfs(tmp_path, 4)
+    seen = []
+
+    def progress(path: Path, stage: str, percent: int) -> None:
+        if not seen or seen[-1] != path:
+            seen.append(path)
+
+    # Each file alone exceeds the budget, so they run one after another
+    results = list(
+        run_batch(files, jobs=4, memory_budget=1, progress=progress, sidecar=False)
+    )
+    assert [r[0] for r in results] == files
+    assert all(err is None for _p, _rep, err in results)
+    assert seen == files
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_batch_batch_durability_reports_after_commit(tmp_path: Path, jobs: int):
+    files = make_sample_pdfs(tmp_path, 3)
+    d = tmp_path / "e.docx"
+    make_min_docx(d)
+    files.append(d)
+    originals = {f: f.read_bytes() for f in files}
+
+    seen = []
+    for path, _, err in run_batch(files, jobs=jobs, durability="batch", mode="backup"):
+        assert err is None
+        # A report is only handed out once its document has been replaced
+        assert path.read_bytes() != originals[path]
+        assert path.with_suffix(path.suffix + ".bak").read_bytes() == originals[path]
+        assert path.with_suffix(path.suffix + ".sanitize.json").exists()
+        seen.append(path)
+    assert seen == files
+    assert not [f for f in tmp_path.iterdir() if "_clean" in f.name or f.suffix == ".tmp"]
+
+
+def test_workers_leave_ctrl_c_to_the_parent():
+    import signal
+
+    with worker_pool(1, start_method="spawn") as pool:
+        assert pool.submit(signal.getsignal, signal.SIGINT).result() == signal.SIG_IGN
@@ -0,0 +1,121 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pikepdf")
+
+from sanitize.core.cache import ResultCache
+from sanitize.core.ops import process_file
+
+from .test_docx import make_min_docx
+from .test_pdf import make_sample_pdf, make_sample_pdfs
+
+
+def test_cache_skips_already_sanitized(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache.sqlite3")
+    p = tmp_path / "a.pdf"
+    make_sample_pdf(p)
+    dirty = tmp_path / "dirty-copy.pdf"
+    shutil.copy(p, dirty)
+
+    first = process_file(p, cache=cache, sidecar=False)
+    assert not first.cached and first.actions
+    clean = p.read_bytes()
+
+    again = process_file(p, cache=cache, sidecar=False)
+    assert again.cached
+    assert again.actions == first.actions
+    assert p.read_bytes() == clean
+
+    # Same dirty content elsewhere must still be sanitized
+    other = process_file(dirty, cache=cache, sidecar=False)
+    assert not other.cached
+
+
+def test_cache_export_needs_matching_output(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache.sqlite3")
+    p = tmp_path / "b.docx"
+    make_min_docx(p)
+    out_dir = tmp_path / "out"
+
+    assert not process_file(p, mode="export", out_dir=out_dir, cache=cache).cached
+    assert process_file(p, mode="export", out_dir=out_dir, cache=cache).cached
+
+    (out_dir / "b.docx").unlink()
+    assert not process_file(p, mode="export", out_dir=out_dir, cache=cache).cached
+    assert (out_dir / "b.docx").exists()
+
+
+def test_cache_keys_on_save_profile(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache.sqlite3")
+    p = tmp_path / "a.pdf"
+    make_sample_pdf(p)
+    rep = process_file(p, cache=cache)
+    assert rep.save_profile == "web" and not rep.cached
+    assert process_file(p, cache=cache).cached
+    # Same content, different save options: not a result we have
+    rep = process_file(p, cache=cache, save_profile="fast")
+    assert rep.save_profile == "fast" and not rep.cached
+
+
+def test_cache_prune_and_clear(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache.sqlite3", max_entries=2)
+    for p in make_sample_pdfs(tmp_path, 3, "c"):
+        process_file(p, cache=cache, sidecar=False)
+    assert cache.prune() > 0
+    assert cache.clear() == 2
+    cache.close()
+
+
+def test_cache_copies_share_a_worker_connection(tmp_path: Path):
+    import pickle
+
+    cache = ResultCache(tmp_path / "cache.sqlite3")
+    one, two = pickle.loads(pickle.dumps(cache)), pickle.loads(pickle.dumps(cache))
+    conn = one._db()
+    assert two._db() is conn
+    one.close()
+    assert two.get("0" * 64, "balanced") is None  # still open for the next task
+    assert cache._db() is not conn
+    cache.close()
+
+
+def test_cache_pool_batches_are_pruned_from_the_parent(tmp_path: Path, monkeypatch):
+    from sanitize.core import cache as cachemod
+    from sanitize.core.batch import run_batch
+
+    monkeypatch.setattr(cachemod, "_PRUNE_EVERY", 2)
+    cache = ResultCache(tmp_path / "cache.sqlite3", max_entries=2)
+    files = make_sample_pdfs(tmp_path, 4, "c")
+    results = list(run_batch(files, jobs=2, cache=cache, sidecar=False))
+    assert all(err is None for _p, _rep, err in results)
+    # Each worker's copy inserts only a row or two; the parent still evicts
+    (rows,) = cache._db().execute("SELECT COUNT(*) FROM results").fetchone()
+    assert rows <= 2
+    cache.close()
+
+
+@pytest.mark.parametrize("durability", ["file", "batch"])
+def test_cache_hit_export_is_durable(tmp_path: Path, monkeypatch, durability: str):
+    from sanitize.core import fileio
+
+    cache = ResultCache(tmp_path / "cache.sqlite3")
+    p = tmp_path / "b.docx"
+    make_min_docx(p)
+    process_file(p, cache=cache, sidecar=False)  # p is clean from here on
+
+    synced = []
+    real_fsync = fileio._fsync_path
+    monkeypatch.setattr(
+        fileio,
+        "_fsync_path",
+        lambda path, directory=False: synced.append(Path(path)) or real_fsync(path, directory),
+    )
+    out_dir = tmp_path / "out"
+    rep = process_file(p, mode="export", out_dir=out_dir, cache=cache, durability=durability)
+    assert rep.cached
+    assert (out_dir / "b.docx").read_bytes() == p.read_bytes()
+    assert (out_dir / "b.docx.sanitize.json").exists()
+    assert out_dir / "b.docx" in synced or durability == "batch"
+    assert out_dir in synced
@@ -0,0 +1,62 @@
+import os
+from pathlib import Path
+
+from sanitize import discover
+from sanitize.discover import iter_documents
+
+
+def _touch(root: Path, *names: str) -> None:
+    for name in names:
+        p = root / name
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(b"x")
+
+
+def test_iter_documents_walks_and_filters(tmp_path: Path):
+    _touch(
+        tmp_path,
+        "a.pdf",
+        "notes.txt",
+        "sub/b.DOCX",
+        "sub/deep/c.pdf",
+        "drafts/d.pdf",
+        "build/e.pdf",
+    )
+
+    def found(**kwargs):
+        paths = iter_documents([str(tmp_path)], **kwargs)
+        return sorted(p.relative_to(tmp_path).as_posix() for p in paths)
+
+    assert found() == []  # directories need --recursive
+    assert found(recursive=True) == [
+        "a.pdf", "build/e.pdf", "drafts/d.pdf", "sub/b.DOCX", "sub/deep/c.pdf"
+    ]
+    assert found(recursive=True, exclude=["drafts", "build"]) == [
+        "a.pdf", "sub/b.DOCX", "sub/deep/c.pdf"
+    ]
+    assert found(recursive=True, include=["*.pdf"], exclude=["sub/deep/*"]) == [
+        "a.pdf", "build/e.pdf", "drafts/d.pdf"
+    ]
+    assert found(recursive=True, include=["sub/*.pdf"]) == ["sub/deep/c.pdf"]  # "*" spans "/"
+
+    # Named files are passed through whatever their type; globs still apply filters
+    named = list(iter_documents([str(tmp_path / "notes.txt"), str(tmp_path / "*.pdf")]))
+    assert [p.name for p in named] == ["notes.txt", "a.pdf"]
+    assert list(iter_documents([str(tmp_path / "*")], exclude=["*.txt"])) == [tmp_path / "a.pdf"]
+
+
+def test_iter_documents_is_lazy(tmp_path: Path, monkeypatch):
+    for i in range(5):
+        _touch(tmp_path, f"d{i}/doc.pdf")
+    calls = []
+    real_scandir = os.scandir
+
+    def scandir(path):
+        calls.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(discover.os, "scandir", scandir)
+    it = iter_documents([str(tmp_path)], recursive=True)
+    assert next(it).name == "doc.pdf"
+    assert len(calls) == 2  # the root and the first subdirectory only
+    assert len(list(it)) == 4
@@ -1,5 +1,8 @@
+import io
 from pathlib import Path
+import struct
 import zipfile
+import zlib
 
 from sanitize.core import docx as docxmod
 
@@ -75,3 +78,155 @@ def test_docx_sanitize_inplace(tmp_path: Path):
     assert after["custom_props_present"] is False
     assert after["thumbnail_present"] is False
 
+
+
+def test_docx_in_memory_state_matches_reread(tmp_path: Path):
+    p = tmp_path / "sample.docx"
+    make_min_docx(p)
+
+    rep = docxmod.sanitize_inplace(p, verify="full")
+    with zipfile.ZipFile(p, "r") as z:
+        assert rep["new"] == docxmod._read_props(z)
+
+
+def test_docx_untouched_members_copied_raw(tmp_path: Path):
+    p = tmp_path / "media.docx"
+    make_min_docx(p)
+    image = bytes(range(256)) * 64
+    with zipfile.ZipFile(p, "a") as z:
+        z.writestr("word/media/image1.png", image, compress_type=zipfile.ZIP_STORED)
+        z.writestr("word/media/big.bin", image, compress_type=zipfile.ZIP_DEFLATED, compresslevel=1)
+
+    with zipfile.ZipFile(p, "r") as z:
+        before = {i.filename: i for i in z.infolist()}
+
+    docxmod.sanitize_inplace(p)
+
+    with zipfile.ZipFile(p, "r") as z:
+        assert z.testzip() is None
+        for name in ("word/media/image1.png", "word/media/big.bin", "word/document.xml"):
+            info = z.getinfo(name)
+            assert info.compress_type == before[name].compress_type
+            assert info.CRC == before[name].CRC
+            assert info.compress_size == before[name].compress_size
+            assert info.date_time == before[name].date_time
+        assert z.read("word/media/image1.png") == image
+        assert z.read("word/media/big.bin") == image
+
+
+def _zipcrypto(data: bytes, password: bytes, check: int) -> bytes:
+    # Traditional PKWARE encryption: 12-byte header ending in the check byte, then the data
+    keys = [0x12345678, 0x23456789, 0x34567890]
+
+    def update(c: int) -> None:
+        keys[0] = zlib.crc32(bytes([c]), keys[0] ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+        keys[1] = ((keys[1] + (keys[0] & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        keys[2] = zlib.crc32(bytes([keys[1] >> 24]), keys[2] ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+
+    for c in password:
+        update(c)
+    out = bytearray()
+    for c in bytes(11) + bytes([check]) + data:
+        k = keys[2] | 2
+        out.append(c ^ ((k * (k ^ 1)) >> 8) & 0xFF)
+        update(c)
+    return bytes(out)
+
+
+def _append_encrypted(path: Path, name: str, data: bytes, password: bytes) -> None:
+    # Stored, encrypted and followed by a data descriptor, as streaming zip tools write it;
+    # with the descriptor flag the check byte comes from the time, not the CRC
+    info = zipfile.ZipInfo(name, date_time=(2020, 1, 2, 3, 4, 6))
+    info.flag_bits = 0x01 | 0x08
+    info.CRC = zlib.crc32(data)
+    info.file_size = len(data)
+    payload = _zipcrypto(data, password, check=(3 << 11 | 4 << 5 | 3) >> 8)
+    info.compress_size = len(payload)
+    with zipfile.ZipFile(path, "a") as z:
+        assert z.fp is not None
+        info.header_offset = z.fp.tell()
+        z.fp.write(info.FileHeader())
+        z.fp.write(payload)
+        z.fp.write(struct.pack("<LLLL", 0x08074B50, info.CRC, len(payload), len(data)))
+        z.filelist.append(info)
+        z.NameToInfo[name] = info
+        z.start_dir = z.fp.tell()
+        z._didModify = True  # type: ignore[attr-defined]
+
+
+def test_docx_encrypted_member_copied_raw(tmp_path: Path):
+    p = tmp_path / "locked.docx"
+    make_min_docx(p)
+    secret = b"attached payload " * 100
+    _append_encrypted(p, "word/embeddings/secret.bin", secret, b"pw")
+    with zipfile.ZipFile(p, "r") as z:
+        assert z.read("word/embeddings/secret.bin", pwd=b"pw") == secret
+        before = z.getinfo("word/embeddings/secret.bin")
+
+    docxmod.sanitize_inplace(p)
+
+    with zipfile.ZipFile(p, "r") as z:
+        info = z.getinfo("word/embeddings/secret.bin")
+        assert info.flag_bits & 0x09 == 0x09
+        assert (info.CRC, info.compress_size) == (before.CRC, before.compress_size)
+        assert z.read("word/embeddings/secret.bin", pwd=b"pw") == secret
+        assert z.read("word/document.xml")
+
+
+def test_docx_small_chunk_size_streams_members(tmp_path: Path):
+    p = tmp_path / "big.docx"
+    make_min_docx(p)
+    video = bytes(range(256)) * 512
+    with zipfile.ZipFile(p, "a") as z:
+        z.writestr("word/media/video.mp4", video, compress_type=zipfile.ZIP_STORED)
+
+    out = tmp_path / "out.docx"
+    rep = docxmod.sanitize_to(p, out, chunk_size=4096)
+    assert rep["new"]["core"] == {}
+    with zipfile.ZipFile(out, "r") as z:
+        assert z.testzip() is None
+        assert z.read("word/media/video.mp4") == video
+
+
+def test_docx_clean_package_left_untouched(tmp_path: Path):
+    p = tmp_path / "sample.docx"
+    make_min_docx(p)
+    docxmod.sanitize_inplace(p)
+    clean = p.read_bytes()
+
+    rep = docxmod.sanitize_inplace(p)
+    assert rep["old"] == rep["new"]
+    assert p.read_bytes() == clean
+
+    out = tmp_path / "out.docx"
+    docxmod.sanitize_to(p, out)
+    assert out.read_bytes() == clean
+
+
+class _Pipe(io.BytesIO):
+    """Write-only, unseekable, like stdout connected to a pipe."""
+
+    def seekable(self) -> bool:
+        return False
+
+    def tell(self) -> int:
+        raise io.UnsupportedOperation("tell")
+
+
+def test_docx_sanitize_bytes_matches_file(tmp_path: Path):
+    p = tmp_path / "a.docx"
+    make_min_docx(p)
+    data = p.read_bytes()
+
+    rep = docxmod.sanitize_bytes(data)
+    expected = docxmod.sanitize_inplace(p)
+    assert rep["old"] == expected["old"] and rep["new"] == expected["new"]
+    with zipfile.ZipFile(io.BytesIO(rep["data"])) as z:
+        assert "docProps/custom.xml" not in z.namelist()
+        assert docxmod._read_props(z) == rep["new"]
+
+    pipe = _Pipe()
+    docxmod.sanitize_stream(_Pipe(data), pipe)
+    with zipfile.ZipFile(io.BytesIO(pipe.getvalue())) as z:
+        assert z.testzip() is None
+        assert docxmod._read_props(z) == rep["new"]
@@ -0,0 +1,155 @@
+from pathlib import Path
+
+import pytest
+
+from sanitize.core import fileio
+from sanitize.core.fileio import (
+    CommitGroup,
+    copy_file,
+    make_durable,
+    replace,
+    snapshot,
+    staged_source,
+    staging,
+)
+
+
+def test_copy_file(tmp_path: Path):
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"x" * 300_000)
+    dst = tmp_path / "dst.bin"
+    dst.write_bytes(b"stale")
+
+    method = copy_file(src, dst)
+    assert method in {"reflink", "copy_file_range", "copy"}
+    assert dst.read_bytes() == src.read_bytes()
+
+    with pytest.raises(ValueError):
+        copy_file(src, src)
+
+
+def test_copy_file_failure_keeps_previous_copy(tmp_path: Path, monkeypatch):
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"new")
+    dst = tmp_path / "dst.bin"
+    dst.write_bytes(b"previous export")
+
+    def _disk_full(src, dst):
+        Path(dst).write_bytes(b"ne")
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(fileio, "reflink", lambda src, dst: False)
+    monkeypatch.setattr(fileio, "_copy_file_range", lambda src, dst: False)
+    monkeypatch.setattr(fileio.shutil, "copyfile", _disk_full)
+    with pytest.raises(OSError):
+        copy_file(src, dst)
+    assert dst.read_bytes() == b"previous export"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["dst.bin", "src.bin"]
+
+
+@pytest.mark.parametrize("hardlinks", [True, False])
+def test_snapshot_survives_replace(tmp_path: Path, monkeypatch, hardlinks: bool):
+    if not hardlinks:
+
+        def _no_link(src, dst):
+            raise OSError("hardlinks not supported")
+
+        monkeypatch.setattr(fileio.os, "link", _no_link)
+    doc = tmp_path / "doc.pdf"
+    doc.write_bytes(b"original")
+    bak = tmp_path / "doc.pdf.bak"
+
+    method = snapshot(doc, bak)
+    assert method == "hardlink" if hardlinks else method in {"reflink", "copy"}
+    new = tmp_path / "new.tmp"
+    new.write_bytes(b"sanitized")
+    replace(new, doc)
+    assert bak.read_bytes() == b"original"
+    assert doc.read_bytes() == b"sanitized"
+
+    with pytest.raises(FileExistsError):
+        snapshot(doc, bak)
+
+
+@pytest.mark.parametrize("durability", ["none", "file", "batch"])
+def test_replace_durability(tmp_path: Path, durability: str):
+    src = tmp_path / "new.tmp"
+    src.write_bytes(b"new")
+    dst = tmp_path / "doc.pdf"
+    dst.write_bytes(b"old")
+
+    # Outside ``staging`` even "batch" commits straight away
+    replace(src, dst, durability)
+    assert dst.read_bytes() == b"new"
+    assert not src.exists()
+
+
+@pytest.mark.parametrize("syncfs", [True, False])
+def test_commit_group_syncs_before_renaming(tmp_path: Path, monkeypatch, syncfs: bool):
+    events = []
+    monkeypatch.setattr(fileio, "_syncfs", lambda path: events.append(("syncfs",)) or syncfs)
+    real_fsync = fileio._fsync_path
+    monkeypatch.setattr(
+        fileio,
+        "_fsync_path",
+        lambda path, directory=False: events.append(("fsync", Path(path).name))
+        or real_fsync(path, directory),
+    )
+    docs = []
+    with staging(CommitGroup()) as group:
+        for name in ("a.pdf", "b.pdf"):
+            doc = tmp_path / name
+            doc.write_bytes(b"old")
+            tmp = tmp_path / (name + ".tmp")
+            tmp.write_bytes(b"new")
+            replace(tmp, doc, "batch")
+            assert staged_source(doc) == tmp
+            docs.append(doc)
+        bak = tmp_path / "a.pdf.bak"
+        bak.write_bytes(b"old")
+        make_durable(bak, "batch")
+    assert len(group) == 3
+    assert all(d.read_bytes() == b"old" for d in docs)  # nothing replaced before the commit
+
+    real_replace = fileio.os.replace
+    monkeypatch.setattr(
+        fileio.os, "replace", lambda a, b: events.append(("rename",)) or real_replace(a, b)
+    )
+    assert group.commit() == {}
+    assert all(d.read_bytes() == b"new" for d in docs)
+    assert not list(tmp_path.glob("*.tmp"))
+
+    first_rename = events.index(("rename",))
+    synced = events[:first_rename]
+    if syncfs:
+        assert synced == [("syncfs",)]
+    else:
+        assert {("fsync", n) for n in ("a.pdf.tmp", "b.pdf.tmp", "a.pdf.bak")} <= set(synced)
+    # The directory is synced once, after the renames
+    assert events[first_rename:].count(("fsync", tmp_path.name)) == 1
+
+
+def test_commit_group_reports_vanished_outputs(tmp_path: Path):
+    doc = tmp_path / "doc.pdf"
+    doc.write_bytes(b"old")
+    group = CommitGroup([(tmp_path / "gone.tmp", doc)])
+    failed = group.commit()
+    assert isinstance(failed[doc], FileNotFoundError)
+    assert doc.read_bytes() == b"old"
+
+
+def test_replace_unknown_durability(tmp_path: Path):
+    src = tmp_path / "a"
+    src.write_bytes(b"a")
+    with pytest.raises(ValueError):
+        replace(src, tmp_path / "b", "always")
+    assert src.exists()
+
+
+def test_make_durable_read_only_file(tmp_path: Path):
+    doc = tmp_path / "doc.pdf"
+    doc.write_bytes(b"original")
+    doc.chmod(0o444)
+    bak = tmp_path / "doc.pdf.bak"
+    snapshot(doc, bak)
+    make_durable(bak, "file")
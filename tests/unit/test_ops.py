@@ -1,3 +1,4 @@
+import asyncio
 import json
 from pathlib import Path
 
@@ -6,11 +7,11 @@ import pytest
 pytest.importorskip("pikepdf")
 import pikepdf  # type: ignore
 
-from sanitize.core.ops import process_file, detect_kind
+from sanitize.core.ops import process_file, process_many, process_stream, detect_kind
 from sanitize.core import pdf as pdfmod
 from sanitize.core import docx as docxmod
 
-from .test_pdf import make_sample_pdf
+from .test_pdf import make_sample_pdf, make_sample_pdfs
 from .test_docx import make_min_docx
 
 
@@ -28,9 +29,13 @@ def test_process_pdf_modes(tmp_path: Path):
     assert data["document"].endswith("a.pdf")
     assert data["actions"]
 
-    # backup
+    # backup: the untouched original lives on as the .bak
+    original = p.read_bytes()
     rep2 = process_file(p, preset="balanced", mode="backup", out_dir=None, sidecar=True)
-    assert p.with_suffix(".pdf.bak").exists()
+    bak = p.with_suffix(".pdf.bak")
+    assert bak.read_bytes() == original
+    assert p.read_bytes() != original
+    assert not p.samefile(bak)
 
 
 def test_process_docx_modes(tmp_path: Path):
@@ -41,3 +46,176 @@ def test_process_docx_modes(tmp_path: Path):
     assert (out_dir / "b.docx").exists()
     assert (out_dir / "b.docx.sanitize.json").exists()
 
+
+
+def test_report_has_stage_timings(tmp_path: Path):
+    p = tmp_path / "a.pdf"
+    make_sample_pdf(p)
+    size = p.stat().st_size
+    rep = process_file(p, mode="backup", sidecar=True)
+    for stage in ("open", "hash", "inspect", "strip", "save", "replace", "backup", "sidecar"):
+        assert stage in rep.stages
+    assert rep.bytes_read >= size
+    # The backup is a hardlink (or clone) of the original where possible, so only
+    # the sanitized output necessarily counts as written
+    assert rep.bytes_written >= rep.new["size_bytes"]
+
+    d = tmp_path / "b.docx"
+    make_min_docx(d)
+    rep = process_file(d, sidecar=False)
+    assert {"open", "inspect", "strip", "write", "replace"} <= set(rep.stages)
+    assert rep.bytes_written == d.stat().st_size
+
+
+def test_progress_events(tmp_path: Path):
+    for p, maker in ((tmp_path / "a.pdf", make_sample_pdf), (tmp_path / "b.docx", make_min_docx)):
+        maker(p)
+        events = []
+        process_file(
+            p,
+            sidecar=False,
+            progress=lambda stage, pct, events=events: events.append((stage, pct)),
+        )
+        percents = [pct for _, pct in events]
+        assert percents == sorted(percents)
+        assert events[-1] == ("done", 100)
+        assert "strip" in {stage for stage, _ in events}
+
+
+def test_process_stream_sniffs_kind(tmp_path: Path):
+    import io
+
+    p = tmp_path / "a.pdf"
+    make_sample_pdf(p)
+    out = io.BytesIO()
+    rep = process_stream(io.BytesIO(p.read_bytes()), out)
+    assert rep.type == "pdf" and rep.document == "-" and rep.actions
+    assert out.getvalue().startswith(b"%PDF-")
+
+    d = tmp_path / "b.docx"
+    make_min_docx(d)
+    out = io.BytesIO()
+    assert process_stream(io.BytesIO(d.read_bytes()), out).type == "docx"
+
+    with pytest.raises(ValueError):
+        process_stream(io.BytesIO(b"hello"), io.BytesIO())
+
+
+def test_process_many_yields_reports_and_failures(tmp_path: Path):
+    files = make_sample_pdfs(tmp_path, 5)
+    bad = tmp_path / "bad.pdf"
+    bad.write_bytes(b"not a pdf")
+
+    async def collect():
+        return [r async for r in process_many([*files, bad], concurrency=2, sidecar=False)]
+
+    reports = asyncio.run(collect())
+    by_doc = {r.document: r for r in reports}
+    assert set(by_doc) == {str(p) for p in [*files, bad]}
+    assert all(by_doc[str(p)].actions and not by_doc[str(p)].errors for p in files)
+    assert by_doc[str(bad)].errors
+
+
+def test_process_many_cancel_cleans_up(tmp_path: Path):
+    files = make_sample_pdfs(tmp_path, 8)
+    original = files[0].read_bytes()
+
+    async def consume_one():
+        async for _ in process_many(files, concurrency=3, sidecar=False):
+            asyncio.current_task().cancel()
+            await asyncio.sleep(0)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(consume_one())
+    # No temp files left behind; every file is either untouched or fully sanitized
+    assert sorted(tmp_path.iterdir()) == sorted(files)
+    for p in files:
+        if p.read_bytes() != original:
+            assert not pdfmod.read_state(p)["docinfo"]
+
+
+@pytest.mark.parametrize("kind", ["pdf", "docx"])
+def test_audit_predicts_sanitize_actions(tmp_path: Path, kind: str):
+    p = tmp_path / f"a.{kind}"
+    (make_sample_pdf if kind == "pdf" else make_min_docx)(p)
+    original = p.read_bytes()
+
+    audit = process_file(p, audit=True)
+    assert audit.output_mode == "audit" and audit.actions
+    assert p.read_bytes() == original
+    assert list(tmp_path.iterdir()) == [p]
+
+    real = process_file(p, sidecar=False)
+    # PDF audits skip the page tree, so page metadata is the only thing they miss
+    assert audit.actions == [a for a in real.actions if a != "page metadata removed"]
+
+
+def test_process_file_batch_durability(tmp_path: Path, monkeypatch):
+    from sanitize.core import fileio
+    from sanitize.core.fileio import CommitGroup, staging
+
+    p = tmp_path / "a.pdf"
+    make_sample_pdf(p)
+    d = tmp_path / "b.docx"
+    make_min_docx(d)
+    originals = {f: f.read_bytes() for f in (p, d)}
+
+    # Inside a staging group nothing lands, or is synced, until the group is committed
+    synced = []
+    real_fsync = fileio._fsync_path
+    monkeypatch.setattr(
+        fileio,
+        "_fsync_path",
+        lambda path, directory=False: synced.append(path) or real_fsync(path, directory),
+    )
+    with staging(CommitGroup()) as group:
+        for f in (p, d):
+            rep = process_file(f, mode="backup", sidecar=True, durability="batch")
+            assert rep.actions
+    assert synced == []
+    for f in (p, d):
+        assert f.read_bytes() == originals[f]
+        assert not f.with_suffix(f.suffix + ".sanitize.json").exists()
+    assert group.commit() == {}
+    for f in (p, d):
+        assert f.read_bytes() != originals[f]
+        assert f.with_suffix(f.suffix + ".bak").read_bytes() == originals[f]
+        assert f.with_suffix(f.suffix + ".sanitize.json").exists()
+
+    # On its own, a file is committed before process_file returns
+    e = tmp_path / "c.pdf"
+    make_sample_pdf(e)
+    original = e.read_bytes()
+    process_file(e, sidecar=False, durability="batch")
+    assert e.read_bytes() != original
+    assert sorted(f.name for f in tmp_path.iterdir() if f.name.startswith("c")) == ["c.pdf"]
+
+    with pytest.raises(ValueError):
+        process_file(p, sidecar=False, durability="sometimes")
+
+
+@pytest.mark.parametrize("durability", ["none", "batch"])
+def test_backup_kept_only_when_replaced(tmp_path: Path, monkeypatch, durability: str):
+    # Already clean: _rewrite leaves the package untouched, so no .bak shares its inode
+    d = tmp_path / "b.docx"
+    make_min_docx(d)
+    process_file(d, sidecar=False)
+    clean = d.read_bytes()
+    rep = process_file(d, mode="backup", sidecar=False, durability=durability)
+    assert not rep.actions
+    assert d.read_bytes() == clean
+    assert not d.with_suffix(".docx.bak").exists()
+
+    # A failed sanitize leaves the document as it was, and no backup
+    p = tmp_path / "a.pdf"
+    make_sample_pdf(p)
+    original = p.read_bytes()
+
+    def _fail(*args, **kwargs):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(pdfmod, "sanitize_inplace", _fail)
+    with pytest.raises(RuntimeError):
+        process_file(p, mode="backup", sidecar=False, durability=durability)
+    assert p.read_bytes() == original
+    assert sorted(tmp_path.iterdir()) == [p, d]
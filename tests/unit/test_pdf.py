@@ -1,5 +1,6 @@
 import json
 from pathlib import Path
+from typing import List
 
 import pytest
 
@@ -14,8 +15,7 @@ from sanitize.core import pdf as pdfmod
 def make_sample_pdf(path: Path) -> None:
     pdf = pikepdf.Pdf.new()
     # Add a page
-    page = pikepdf.Page(pikepdf.Rectangle(0, 0, 200, 200))
-    pdf.pages.append(page)
+    page = pdf.add_blank_page(page_size=(200, 200))
 
     # DocInfo
     pdf.docinfo["/Title"] = "Test Title"
@@ -29,7 +29,7 @@ def make_sample_pdf(path: Path) -> None:
     # Names.JavaScript (minimal stub)
     names = pikepdf.Dictionary()
     jsdict = pikepdf.Dictionary()
-    jsdict["/Names"] = pikepdf.Array([pikepdf.String("a"), pikepdf.make_stream(b"app.alert('x')")])
+    jsdict["/Names"] = pikepdf.Array([pikepdf.String("a"), pdf.make_stream(b"app.alert('x')")])
     names["/JavaScript"] = jsdict
     pdf.Root["/Names"] = names
 
@@ -37,14 +37,22 @@ def make_sample_pdf(path: Path) -> None:
     pdf.attachments["test.txt"] = b"hello"
 
     # Page-level metadata
-    page.obj["/Metadata"] = pikepdf.make_stream(b"<x:xmpmeta>")
+    page.obj["/Metadata"] = pdf.make_stream(b"<x:xmpmeta>")
 
     # XMP at catalog
-    pdf.Root["/Metadata"] = pikepdf.make_stream(b"<x:xmpmeta>")
+    pdf.Root["/Metadata"] = pdf.make_stream(b"<x:xmpmeta>")
 
     pdf.save(str(path))
 
 
+def make_sample_pdfs(directory: Path, n: int, prefix: str = "d") -> List[Path]:
+    """``n`` sample PDFs named ``<prefix>0.pdf``, ``<prefix>1.pdf``, ... in ``directory``."""
+    paths = [directory / f"{prefix}{i}.pdf" for i in range(n)]
+    for p in paths:
+        make_sample_pdf(p)
+    return paths
+
+
 def test_pdf_sanitize_inplace(tmp_path: Path):
     p = tmp_path / "sample.pdf"
     make_sample_pdf(p)
@@ -70,3 +78,153 @@ def test_pdf_sanitize_inplace(tmp_path: Path):
     assert not after["attachments"]
     assert after["page_metadata_count"] == 0
 
+
+
+def test_pdf_single_pass_matches_double_pass(tmp_path: Path):
+    one = tmp_path / "one.pdf"
+    two = tmp_path / "two.pdf"
+    make_sample_pdf(one)
+    make_sample_pdf(two)
+
+    rep1 = pdfmod.sanitize_inplace(one, verify_idempotent=True)
+    rep2 = pdfmod.sanitize_inplace(two, passes=2)
+    ignore = {"sha256", "size_bytes", "trailer_id"}
+    assert {k: v for k, v in rep1["new"].items() if k not in ignore} == {
+        k: v for k, v in rep2["new"].items() if k not in ignore
+    }
+    assert pdfmod.check_idempotent(one) == []
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["one.pdf", "two.pdf"]
+
+
+def test_pdf_in_memory_state_matches_reread(tmp_path: Path):
+    p = tmp_path / "sample.pdf"
+    make_sample_pdf(p)
+    expected_old = pdfmod.read_state(p)
+
+    rep = pdfmod.sanitize_inplace(p)
+    assert rep["old"] == expected_old
+    assert rep["new"] == pdfmod.read_state(p)
+
+    # full verification re-reads the output and agrees with the in-memory state
+    make_sample_pdf(p)
+    rep = pdfmod.sanitize_inplace(p, verify="full")
+    assert rep["new"] == pdfmod.read_state(p)
+
+
+@pytest.mark.parametrize("profile", pdfmod.SAVE_PROFILES)
+def test_pdf_trailer_id_behind_large_xref_stream(tmp_path: Path, profile: str):
+    # Thousands of objects in object streams: the final xref stream is far
+    # longer than the tail the writer keeps, so its /ID is written well before it
+    p = tmp_path / "big.pdf"
+    with pikepdf.new() as pdf:
+        for _ in range(3000):
+            pdf.add_blank_page()
+        pdf.docinfo["/Author"] = "someone"
+        pdf.save(str(p), object_stream_mode=pikepdf.ObjectStreamMode.generate)
+
+    rep = pdfmod.sanitize_inplace(p, verify="full", save_profile=profile)
+    assert rep["new"]["trailer_id"] == pdfmod.read_state(p)["trailer_id"]
+
+
+def test_pdf_hashing_writer_finds_id_split_across_writes():
+    import io
+
+    body = b"%PDF-1.7\n" + b"x" * 10_000
+    xref = len(body)
+    data = (
+        body
+        + b"9 0 obj\n<< /Type /XRef /ID [<AA11><BB22>] >>\nstream\n"
+        + b"y" * 20_000
+        + b"\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n" % xref
+    )
+    split = data.index(b"<BB22>") + 2
+    writer = pdfmod._HashingWriter(io.BytesIO())
+    writer.write(data[:split])
+    writer.write(data[split:])
+    assert writer.trailer_id() == ["aa11", "bb22"]
+
+
+def test_pdf_sanitize_to_writes_dest_directly(tmp_path: Path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    p = src_dir / "sample.pdf"
+    make_sample_pdf(p)
+    original = p.read_bytes()
+
+    dest = tmp_path / "out" / "sample.pdf"
+    dest.parent.mkdir()
+    rep = pdfmod.sanitize_to(p, dest)
+    assert p.read_bytes() == original
+    assert list(src_dir.iterdir()) == [p]
+    assert list(dest.parent.iterdir()) == [dest]
+    assert rep["path"] == str(dest)
+    assert rep["old"]["sha256"] == pdfmod.read_state(p)["sha256"]
+    assert rep["new"] == pdfmod.read_state(dest)
+
+
+@pytest.mark.parametrize("profile", pdfmod.SAVE_PROFILES)
+def test_pdf_save_profiles(tmp_path: Path, profile: str):
+    p = tmp_path / f"{profile}.pdf"
+    make_sample_pdf(p)
+    rep = pdfmod.sanitize_inplace(p, save_profile=profile)
+    assert rep["new"]["xmp_present"] is False
+    with pikepdf.open(str(p)) as pdf:
+        assert pdf.is_linearized == (profile == "web")
+
+
+def test_pdf_save_profile_for_preset():
+    assert pdfmod.save_profile_for("balanced") == "web"
+    assert pdfmod.save_profile_for("aggressive") == "compact"
+    assert pdfmod.save_profile_for("balanced", "fast") == "fast"
+    with pytest.raises(ValueError):
+        pdfmod.save_profile_for("balanced", "bogus")
+
+
+def test_pdf_sanitize_bytes(tmp_path: Path):
+    p = tmp_path / "a.pdf"
+    make_sample_pdf(p)
+    data = p.read_bytes()
+    rep = pdfmod.sanitize_bytes(data)
+    assert rep["old"]["sha256"] == pdfmod._sha256(p)
+    assert rep["new"]["size_bytes"] == len(rep["data"])
+    out = tmp_path / "out.pdf"
+    out.write_bytes(rep["data"])
+    state = pdfmod.read_state(out)
+    assert state == rep["new"]
+    assert p.read_bytes() == data
+    assert sorted(tmp_path.iterdir()) == sorted([p, out])  # no temp files
+
+
+def test_pdf_fused_page_walk_matches_read_state(tmp_path: Path):
+    p = tmp_path / "pages.pdf"
+    pdf = pikepdf.Pdf.new()
+    for i in range(6):
+        page = pdf.add_blank_page(page_size=(200, 200))
+        if i % 2:
+            page.obj["/PieceInfo"] = pikepdf.Dictionary()
+        if i % 3 == 0:
+            page.obj["/LastModified"] = pikepdf.String("D:20200101000000Z")
+    pdf.save(str(p))
+
+    before = pdfmod.read_state(p)
+    assert before["page_metadata_count"] == 4
+    for passes in (1, 2):
+        dest = tmp_path / f"out{passes}.pdf"
+        rep = pdfmod.sanitize_to(p, dest, passes=passes)
+        assert rep["old"] == before
+        assert list(rep["new"]) == list(before)
+        assert rep["new"] == pdfmod.read_state(dest)
+        assert rep["new"]["page_metadata_count"] == 0
+
+
+def test_pdf_estimate_memory_follows_object_count(tmp_path: Path):
+    small, large = tmp_path / "small.pdf", tmp_path / "large.pdf"
+    for path, pages in ((small, 1), (large, 500)):
+        pdf = pikepdf.Pdf.new()
+        for _ in range(pages):
+            pdf.add_blank_page()
+        pdf.save(str(path))
+    assert pdfmod.estimate_memory(large) > pdfmod.estimate_memory(small) > 0
+    garbage = tmp_path / "garbage.pdf"
+    garbage.write_bytes(b"x" * 4096)
+    assert pdfmod.estimate_memory(garbage) > 0
@@ -0,0 +1,54 @@
+import json
+import tracemalloc
+from dataclasses import asdict
+from pathlib import Path
+
+from sanitize.core.report import FileReport, SessionReports, now_iso
+
+
+def _report(i: int) -> FileReport:
+    return FileReport(
+        sanitized_at_utc=now_iso(),
+        document=f"/share/docs/file{i:05d}.pdf",
+        type="pdf",
+        old={"docinfo": {f"/Key{k}": "x" * 200 for k in range(10)}, "attachments": ["a"] * 20},
+        new={"docinfo": {}, "attachments": []},
+        actions=["docinfo:/Author removed", "attachments removed"],
+        preset="balanced",
+        output_mode="replace",
+        duration_ms=i,
+    )
+
+
+def test_session_reports_spill_and_export(tmp_path: Path):
+    reports = [_report(i) for i in range(50)]
+    session = SessionReports()
+    for r in reports:
+        session.add(r)
+
+    items = list(session)
+    assert len(session) == 50
+    assert items[3].document == reports[3].document and items[3].duration_ms == 3
+    assert items[0].actions[0] is items[1].actions[0]  # interned
+    assert session.full(items[7]) == reports[7]
+
+    out = tmp_path / "session.json"
+    session.export(out)
+    assert out.read_text(encoding="utf-8") == json.dumps([asdict(r) for r in reports], indent=2)
+    session.close()
+
+    empty = SessionReports()
+    empty.export(out)
+    assert json.loads(out.read_text()) == []
+
+
+def test_session_reports_keep_little_in_memory():
+    session = SessionReports()
+    tracemalloc.start()
+    for i in range(2000):
+        session.add(_report(i))
+    held, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    session.close()
+    # Each report above is ~3 KB of state; only the compact part stays resident
+    assert held / 2000 < 1000
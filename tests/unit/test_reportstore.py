@@ -0,0 +1,87 @@
+import hashlib
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pikepdf")
+
+from sanitize.core.ops import process_file
+from sanitize.core.reportstore import (
+    JsonlReportStore,
+    ReportStore,
+    SqliteReportStore,
+    open_report_store,
+)
+
+from .test_docx import make_min_docx
+from .test_pdf import make_sample_pdf
+
+
+@pytest.mark.parametrize("name", ["reports.jsonl", "reports.sqlite"])
+def test_report_store_appends_and_finds(tmp_path: Path, name: str):
+    p = tmp_path / "a.pdf"
+    make_sample_pdf(p)
+    d = tmp_path / "b.docx"
+    make_min_docx(d)
+    pdf_rep = process_file(p, sidecar=False)
+    docx_rep = process_file(d, sidecar=False)
+
+    path = tmp_path / name
+    with open_report_store(path, batch_size=10) as store:
+        store.add(pdf_rep)
+        store.add(docx_rep)
+        assert store.find(document=str(d)) == [docx_rep]
+    assert not list(tmp_path.glob("*.sanitize.json"))
+
+    # Appends across runs; queryable by path and by input or output digest
+    with open_report_store(path) as store:
+        store.add(pdf_rep)
+        assert store.find(document=str(p)) == [pdf_rep, pdf_rep]
+        assert store.find(digest=pdf_rep.old["sha256"]) == [pdf_rep, pdf_rep]
+        assert store.find(digest=pdf_rep.new["sha256"], document=str(d)) == []
+        assert len(store.find()) == 3
+
+
+@pytest.mark.parametrize("name", ["reports.jsonl", "reports.sqlite"])
+def test_report_store_finds_docx_by_digest(tmp_path: Path, name: str):
+    d = tmp_path / "b.docx"
+    make_min_docx(d)
+    before = hashlib.sha256(d.read_bytes()).hexdigest()
+    assert "sha256" not in process_file(d, dry_run=True).old
+    rep = process_file(d, sidecar=False, digests=True)
+    after = hashlib.sha256(d.read_bytes()).hexdigest()
+    assert (rep.old["sha256"], rep.new["sha256"]) == (before, after)
+
+    with open_report_store(tmp_path / name) as store:
+        store.add(rep)
+        assert store.find(digest=before) == [rep]
+        assert store.find(digest=after) == [rep]
+
+
+@pytest.mark.parametrize("cls", [JsonlReportStore, SqliteReportStore])
+def test_report_store_batches_writes(tmp_path: Path, cls):
+    p = tmp_path / "a.pdf"
+    make_sample_pdf(p)
+    rep = process_file(p, sidecar=False)
+    path = tmp_path / "store"
+
+    def stored() -> int:
+        with cls(path) as reader:
+            return len(reader.find())
+
+    store = cls(path, batch_size=3, flush_interval=0.1)
+    store.add(rep)
+    store.add(rep)
+    assert stored() == 0  # still buffered
+    store.add(rep)
+    assert stored() == 3  # batch full: written
+    store.add(rep)
+    time.sleep(0.5)
+    assert stored() == 4  # written by the timer
+    store.close()
+
+
+def test_report_store_is_abstract(tmp_path: Path):
+    with pytest.raises(TypeError):
+        ReportStore(tmp_path / "store")  # type: ignore[abstract]
@@ -0,0 +1,69 @@
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pikepdf")
+if not hasattr(socket, "AF_UNIX"):
+    pytest.skip("needs Unix domain sockets", allow_module_level=True)
+
+from sanitize.server import SanitizeServer, request
+
+from .test_docx import make_min_docx
+from .test_pdf import make_sample_pdf, make_sample_pdfs
+
+
+@pytest.fixture
+def server(tmp_path: Path):
+    srv = SanitizeServer(tmp_path / "sanitize.sock", jobs=1)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    thread.join()
+    assert not srv.socket_path.exists()
+
+
+def test_server_streams_reports(server: SanitizeServer, tmp_path: Path):
+    pdf = tmp_path / "a.pdf"
+    make_sample_pdf(pdf)
+    docx = tmp_path / "b.docx"
+    make_min_docx(docx)
+    missing = tmp_path / "missing.pdf"
+
+    replies = list(request(server.socket_path, [str(pdf), str(missing), str(docx)], sidecar=False))
+    assert [r["document"] for r in replies] == [str(pdf), str(missing), str(docx)]
+    assert replies[0]["type"] == "pdf" and replies[0]["actions"]
+    assert "error" in replies[1]
+    assert replies[2]["type"] == "docx"
+    assert not (tmp_path / "a.pdf.sanitize.json").exists()
+
+
+def test_server_rejects_unknown_fields(server: SanitizeServer, tmp_path: Path):
+    with pytest.raises(ValueError, match="unknown request fields"):
+        list(request(server.socket_path, [], cache="/tmp/x"))
+
+
+def test_server_refuses_live_socket(server: SanitizeServer):
+    with pytest.raises(OSError, match="already listening"):
+        SanitizeServer(server.socket_path, jobs=1)
+
+
+def test_server_prunes_cache_after_each_request(tmp_path: Path):
+    from sanitize.core.cache import ResultCache
+
+    cache = ResultCache(tmp_path / "cache.sqlite3", max_entries=1)
+    srv = SanitizeServer(tmp_path / "cached.sock", jobs=1, cache=cache)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    try:
+        files = [str(p) for p in make_sample_pdfs(tmp_path, 2, "c")]
+        assert len(list(request(srv.socket_path, files, sidecar=False))) == 2
+        (rows,) = cache._db().execute("SELECT COUNT(*) FROM results").fetchone()
+        assert rows == 1
+    finally:
+        srv.shutdown()
+        srv.server_close()
+        thread.join()
@@ -0,0 +1,123 @@
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from sanitize.core.docx import sanitize_inplace
+from sanitize.watch import DropWatcher
+
+from .test_docx import make_min_docx
+
+SOURCES = [pytest.param(0.05, id="polling")]
+if sys.platform.startswith("linux"):
+    SOURCES.append(pytest.param(None, id="inotify"))
+
+
+@pytest.mark.parametrize("poll_interval", SOURCES)
+def test_watcher_yields_settled_drops_once(tmp_path: Path, poll_interval):
+    existing = tmp_path / "existing.docx"
+    make_min_docx(existing)
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    watcher = DropWatcher([tmp_path], settle=0.2, poll_interval=poll_interval).start()
+    seen = []
+
+    def consume():
+        for path in watcher:
+            seen.append(path.name)
+            sanitize_inplace(path)
+            watcher.mark_done(path)
+
+    t = threading.Thread(target=consume, daemon=True)
+    t.start()
+    dropped = tmp_path / "dropped.docx"
+    make_min_docx(dropped)
+    t.join(timeout=1.5)  # outlive several settle windows
+    watcher.stop()
+    t.join(timeout=3)
+
+    assert not t.is_alive()
+    assert sorted(seen) == ["dropped.docx", "existing.docx"]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_watch_batch_reports_each_drop_promptly(tmp_path: Path, jobs: int):
+    from sanitize.core.batch import run_batch
+
+    watcher = DropWatcher([tmp_path], settle=0.1, poll_interval=0.05).start()
+    results = run_batch(watcher, jobs=jobs, ordered=False, sidecar=False)
+    seen = []
+
+    def consume():
+        for path, _, err in results:
+            watcher.mark_done(path)
+            seen.append((path.name, err))
+
+    t = threading.Thread(target=consume, daemon=True)
+    t.start()
+    try:
+        for i in range(3):
+            make_min_docx(tmp_path / f"drop{i}.docx")
+            # A lone drop must come back without waiting for more work to fill the pool
+            deadline = time.monotonic() + 10
+            while len(seen) <= i and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert seen == [(f"drop{n}.docx", None) for n in range(i + 1)]
+    finally:
+        watcher.stop()
+        t.join(timeout=10)
+    assert not t.is_alive()
+
+
+def test_watcher_startup_scan_skips_excluded(tmp_path: Path):
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    make_min_docx(out_dir / "earlier-output.docx")
+    make_min_docx(tmp_path / "waiting.docx")
+
+    watcher = DropWatcher(
+        [tmp_path], recursive=True, settle=0.1, poll_interval=0.05, exclude=[out_dir]
+    ).start()
+    seen = []
+    try:
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            try:
+                path = watcher.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            seen.append(path.name)
+            watcher.mark_done(path)
+    finally:
+        watcher.stop()
+    assert seen == ["waiting.docx"]
+
+
+def test_watch_stops_cleanly_on_sigterm(tmp_path: Path, monkeypatch):
+    import os
+    import signal
+
+    from sanitize.app import headless_main
+    from sanitize.core import docx as docxmod
+
+    drop = tmp_path / "drop.docx"
+    make_min_docx(drop)
+    original = drop.read_bytes()
+    write_package = docxmod._write_package
+
+    def _interrupted(*args, **kwargs):
+        # Stop the watcher while the file is being written to its temp file
+        os.kill(os.getpid(), signal.SIGTERM)
+        return write_package(*args, **kwargs)
+
+    monkeypatch.setattr(docxmod, "_write_package", _interrupted)
+    before = signal.getsignal(signal.SIGTERM)
+    args = ["--watch", "--watch-settle", "0.1", "--watch-poll", "0.05", str(tmp_path)]
+    code = headless_main(args)
+    assert code == 0
+    assert signal.getsignal(signal.SIGTERM) == before
+    assert drop.read_bytes() == original
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["drop.docx"]